@@ -8,6 +8,9 @@ from app.models.expense import Expense
 from app.models.budget import Budget
 from app.models.goal import Goal
 from app.models.autonomous_action import AutonomousAction
+from app.models.monthly_total import UserMonthlyTotal
+from app.models.merchant_baseline import MerchantBaseline
+from app.models.backtest_point import ForecastBacktestPoint
 
 from alembic import context
 
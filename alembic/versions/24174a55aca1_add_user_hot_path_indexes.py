@@ -0,0 +1,63 @@
+"""add user_id hot path indexes on expenses, budgets and goals
+
+Revision ID: 24174a55aca1
+Revises: 206f3e732202
+Create Date: 2026-10-17 09:12:44.180233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '24174a55aca1'
+down_revision: Union[str, Sequence[str], None] = '206f3e732202'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_expenses_user_id_created_at', 'expenses', ['user_id', 'created_at']),
+    ('ix_expenses_user_id_category', 'expenses', ['user_id', 'category']),
+    ('ix_budgets_user_id', 'budgets', ['user_id']),
+    ('ix_goals_user_id', 'goals', ['user_id']),
+]
+
+
+def _existing_tables():
+    if op.get_context().as_sql:
+        # offline (--sql) mode has no connection to inspect; emit everything
+        return {table for _, table, _ in INDEXES}
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY so
+    writes to the tables are not blocked. CONCURRENTLY cannot run inside a
+    transaction, hence the autocommit block. Tables that are not managed by
+    the migration history (e.g. `goals`, created by `create_all`) are skipped
+    when absent.
+    """
+    tables = _existing_tables()
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if table not in tables:
+                continue
+            op.create_index(
+                name, table, columns, unique=False,
+                if_not_exists=True, postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    tables = _existing_tables()
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            if table not in tables:
+                continue
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""add merchant_baselines table
+
+Revision ID: 3e9b1c7d42f0
+Revises: 75c7615d718a
+Create Date: 2026-10-17 14:22:05.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9b1c7d42f0'
+down_revision: Union[str, Sequence[str], None] = '75c7615d718a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Populate existing data afterwards with
+    `python -m app.scripts.backfill_merchant_baselines`.
+    """
+    op.create_table(
+        'merchant_baselines',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('merchant', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('mean', sa.Float(), nullable=False),
+        sa.Column('m2', sa.Float(), nullable=False),
+        sa.Column('sketch', sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'merchant', name='uq_merchant_baselines_user_merchant')
+    )
+    op.create_index(op.f('ix_merchant_baselines_id'), 'merchant_baselines', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_merchant_baselines_id'), table_name='merchant_baselines')
+    op.drop_table('merchant_baselines')
@@ -0,0 +1,33 @@
+"""add anomaly counts to merchant_baselines
+
+Revision ID: 5c2d8e17a4b9
+Revises: 9a4f2e61c8d3
+Create Date: 2026-10-17 17:05:12.630418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2d8e17a4b9'
+down_revision: Union[str, Sequence[str], None] = '9a4f2e61c8d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Populate the counts for existing expenses afterwards with
+    `python -m app.scripts.backfill_merchant_baselines`.
+    """
+    op.add_column('merchant_baselines',
+                  sa.Column('anomalies', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('merchant_baselines', 'anomalies')
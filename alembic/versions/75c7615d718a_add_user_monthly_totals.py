@@ -0,0 +1,45 @@
+"""add user_monthly_totals rollup table
+
+Revision ID: 75c7615d718a
+Revises: 24174a55aca1
+Create Date: 2026-10-17 11:03:27.514902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '75c7615d718a'
+down_revision: Union[str, Sequence[str], None] = '24174a55aca1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Populate existing data afterwards with
+    `python -m app.scripts.backfill_monthly_totals`.
+    """
+    op.create_table(
+        'user_monthly_totals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'month', 'category', name='uq_user_monthly_totals_user_month_category')
+    )
+    op.create_index(op.f('ix_user_monthly_totals_id'), 'user_monthly_totals', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_monthly_totals_id'), table_name='user_monthly_totals')
+    op.drop_table('user_monthly_totals')
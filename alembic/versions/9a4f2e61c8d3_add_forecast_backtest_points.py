@@ -0,0 +1,43 @@
+"""add forecast_backtest_points table
+
+Revision ID: 9a4f2e61c8d3
+Revises: 3e9b1c7d42f0
+Create Date: 2026-10-17 16:41:52.207719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4f2e61c8d3'
+down_revision: Union[str, Sequence[str], None] = '3e9b1c7d42f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Points are computed on demand by /ml/analytics; no backfill is needed.
+    """
+    op.create_table(
+        'forecast_backtest_points',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.String(length=7), nullable=False),
+        sa.Column('actual', sa.Float(), nullable=False),
+        sa.Column('forecast', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'month', name='uq_forecast_backtest_points_user_month')
+    )
+    op.create_index(op.f('ix_forecast_backtest_points_id'), 'forecast_backtest_points', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_forecast_backtest_points_id'), table_name='forecast_backtest_points')
+    op.drop_table('forecast_backtest_points')
@@ -1,4 +1,4 @@
-from app.core.database import SessionLocal
+from app.core.database import SessionLocal, get_async_session_factory
 from sqlalchemy.orm import Session
 
 
@@ -8,3 +8,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
@@ -36,23 +36,16 @@ def get_summary(profile_id: int = 0, db=Depends(get_db)):
     # For demo, accept profile via query; in prod tie to user session
     if not settings.ENABLE_DASHBOARD:
         raise HTTPException(status_code=503, detail="Assistant features disabled")
-    # For demo: fetch sample expenses from DB if available, else empty
-    from app.services.expense_service import list_expenses
+    # For demo: load the profile's snapshot if available; fall back to defaults
+    from app.repository.snapshot_repository import load_user_snapshot
 
-    # Try to load profile from DB; fall back to defaults
-    profile = {"income": 5000, "monthly_savings": 1000}
+    snapshot = None
     try:
         if profile_id:
-            from app.models.user import User
-            user = db.query(User).filter(User.id == profile_id).first()
-            if user:
-                profile = {"income": getattr(user, "monthly_income", 5000), "monthly_savings": getattr(user, "monthly_savings", 1000)}
+            snapshot = load_user_snapshot(db, profile_id)
     except Exception:
-        pass
+        snapshot = None
 
-    try:
-        expenses = list_expenses(db, profile_id) if profile_id else []
-    except Exception:
-        expenses = []
-
-    return JSONResponse(content=service.summary(profile, expenses))
+    if snapshot is None:
+        return JSONResponse(content=service.summary(dict(service.DEFAULT_PROFILE), []))
+    return JSONResponse(content=service.summary_from_snapshot(snapshot))
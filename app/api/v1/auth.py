@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app.api.deps import get_db
 from app.schemas.user import UserCreate, UserLogin, UserResponse
 from app.services.auth_service import register_user, login_user
+from app.services import user_service
 from app.repository.user_repository import get_user_by_email
 from app.core.security import verify_password, create_access_token
 
@@ -45,8 +46,7 @@ def update_profile(
     user_id: int = 1, # Demo fallback, logic should ideally use JWT sub
     db: Session = Depends(get_db)
 ):
-    from app.repository.user_repository import update_user_profile
-    user = update_user_profile(db, user_id, income, savings, risk)
+    user = user_service.update_profile(db, user_id, income, savings, risk)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
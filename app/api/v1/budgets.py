@@ -1,18 +1,18 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.schemas.budget import BudgetCreate, BudgetResponse
-from app.services.budget_service import add_budget, list_budgets
-from app.api.deps import get_db
+from app.services.budget_service import add_budget_async, list_budgets_async
+from app.api.deps import get_async_db
 
 router = APIRouter(prefix="/budgets", tags=["Budgets"])
 
 
 @router.post("/", response_model=BudgetResponse)
-def create_budget_endpoint(budget: BudgetCreate, user_id: int, db: Session = Depends(get_db)):
-    return add_budget(db, user_id, budget.dict())
+async def create_budget_endpoint(budget: BudgetCreate, user_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await add_budget_async(db, user_id, budget.dict())
 
 
 @router.get("/", response_model=List[BudgetResponse])
-def get_budgets_endpoint(user_id: int, db: Session = Depends(get_db)):
-    return list_budgets(db, user_id)
+async def get_budgets_endpoint(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await list_budgets_async(db, user_id)
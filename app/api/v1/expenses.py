@@ -1,18 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.api.deps import get_db
+from app.api.deps import get_async_db, get_db
+from app.core.cache_manager import CacheManager
 from app.schemas.expense import ExpenseCreate, ExpenseResponse
-from app.services.expense_service import add_expense, list_expenses
-from typing import List
+from app.services.expense_service import (
+    BULK_CHUNK_SIZE,
+    add_expense,
+    add_expenses_bulk,
+    list_expenses_async,
+    list_expenses_page_async,
+)
+from app.utils.expense_import import import_format, iter_records
+from datetime import datetime
+from typing import List, Optional
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
+DEFAULT_PAGE_SIZE = 100
+
 
 @router.post("/", response_model=ExpenseResponse)
 def create_expense(expense: ExpenseCreate, user_id: int, db: Session = Depends(get_db)):
     return add_expense(db, user_id, expense.dict())
 
 
+@router.post("/bulk")
+async def bulk_create_expenses(request: Request, user_id: int, db: Session = Depends(get_db)):
+    """Stream a CSV (`text/csv`) or NDJSON (`application/x-ndjson`) body into expenses.
+
+    Rows are parsed as they arrive and inserted in chunks of BULK_CHUNK_SIZE
+    inside one transaction. Invalid rows are reported per row and skipped.
+    """
+    try:
+        fmt = import_format(request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    results = []
+    chunk = []
+    try:
+        async for record in iter_records(request.stream(), fmt):
+            chunk.append(record)
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                results.extend(await run_in_threadpool(add_expenses_bulk, db, user_id, chunk))
+                chunk = []
+        if chunk:
+            results.extend(await run_in_threadpool(add_expenses_bulk, db, user_id, chunk))
+        await run_in_threadpool(db.commit)
+    except ValueError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=400, detail=str(e))
+    except SQLAlchemyError:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=500, detail="Import failed; no rows were saved")
+
+    created = sum(1 for r in results if r["status"] == "created")
+    if created:
+        await run_in_threadpool(CacheManager.bump_data_version, user_id)
+    return {
+        "user_id": user_id,
+        "received": len(results),
+        "created": created,
+        "failed": len(results) - created,
+        "results": results,
+    }
+
+
 @router.get("/", response_model=List[ExpenseResponse])
-def get_expenses(user_id: int, db: Session = Depends(get_db)):
-    return list_expenses(db, user_id)
+async def get_expenses(
+    response: Response,
+    user_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    category: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    # Without `limit`/`cursor` the full (filtered) history is returned as before.
+    # Paged callers follow the `X-Next-Cursor` header until it is absent.
+    if limit is None and cursor is None:
+        return await list_expenses_async(db, user_id, since=since, until=until, category=category)
+    try:
+        expenses, next_cursor = await list_expenses_page_async(
+            db, user_id, limit or DEFAULT_PAGE_SIZE, cursor,
+            since=since, until=until, category=category,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return expenses
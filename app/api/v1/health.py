@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
-from app.core.database import engine
+from app.core.cache_manager import CacheManager
+from app.core.database import engine, pool_status
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -14,3 +15,15 @@ def health():
         return {"status": "ok"}
     except Exception as e:
         return JSONResponse(status_code=503, content={"status": "fail", "detail": str(e)})
+
+
+@router.get("/db-pool")
+def db_pool():
+    """Connection pool occupancy and checkout wait times, for sizing DB_POOL_SIZE/DB_MAX_OVERFLOW."""
+    return pool_status()
+
+
+@router.get("/cache")
+def cache():
+    """In-process cache occupancy/hit counts and whether Redis is currently being skipped."""
+    return CacheManager.stats()
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
 from app.api.deps import get_db
-from app.services.expense_service import list_expenses
-from app.services.budget_service import list_budgets
+from app.core.database import SessionLocal
+from app.repository.expense_repository import get_expense_columns
+from app.repository.snapshot_repository import load_budget_and_income, load_user_snapshot
+from app.repository.merchant_baseline_repository import anomaly_count
+from app.repository.monthly_total_repository import get_monthly_totals, get_monthly_category_totals
 from app.ml.forecaster import spendingForecaster
 from app.ml.anomaly_detector import AnomalyDetector
 from app.ml.autonomous_engine import AutonomousEngine
@@ -12,52 +19,59 @@ from app.ml.advisor_chatbot import FinancialAdvisorChatbot
 from app.ml.health_score import FinancialHealthScore
 from app.ml.metrics_manager import MetricsManager
 from app.ml.analytics import AnalyticsEngine
-from app.models.user import User
 from app.core.cache_manager import CacheManager
+from app.services import analytics_service
 from app.core.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/ml", tags=["ML & Autonomous Finance"])
 
-def _prepare_expenses(expenses):
-    return [{"id": e.id, "amount": e.amount, "title": e.title, "created_at": e.created_at, "category": e.category} for e in expenses]
+def _in_new_session(compute, *args):
+    """Wrap `compute(db, *args)` to run with its own session, e.g. for background cache refreshes."""
+    def run():
+        db = SessionLocal()
+        try:
+            return compute(db, *args)
+        finally:
+            db.close()
+    return run
 
-def _get_user_income(db: Session, user_id: int) -> float:
-    user = db.query(User).filter(User.id == user_id).first()
-    return user.monthly_income if user else 5000.0 # Default fallback for simulation
-
-@router.get("/forecast")
-def get_spending_forecast(user_id: int, db: Session = Depends(get_db)):
-    # 1. Try Cache First
-    cache_key = f"forecast:{user_id}"
-    cached_res = CacheManager.get(cache_key)
-    if cached_res:
-        return cached_res
-    
-    expenses = list_expenses(db, user_id)
-    if not expenses:
+def _compute_forecast(db: Session, user_id: int) -> Dict:
+    # Reads the monthly rollup (O(months)) instead of every raw expense
+    monthly_totals = get_monthly_totals(db, user_id)
+    if not monthly_totals:
         return {"prediction": 0.0, "message": "Insufficient data for forecast."}
     
-    prepared_data = _prepare_expenses(expenses)
-    forecast_result = spendingForecaster.predict_next_month(prepared_data)
-    insights = spendingForecaster.get_category_recommendations(prepared_data)
+    forecast_result = spendingForecaster.predict_from_monthly_totals(monthly_totals)
+    insights = spendingForecaster.get_category_recommendations(get_monthly_category_totals(db, user_id))
     
-    response = {
+    return {
         "user_id": user_id,
         "forecast_analysis": forecast_result,
         "strategic_insights": insights
     }
-    
-    # 2. Store in Cache (1 hour TTL)
-    CacheManager.set(cache_key, response, expire=3600)
-    return response
+
+def _cached_forecast(db: Session, user_id: int) -> Dict:
+    # Cached per data version; concurrent misses share one computation and
+    # entries older than the soft TTL are refreshed in the background
+    return CacheManager.get_or_compute(
+        CacheManager.user_key("forecast", user_id),
+        lambda: _compute_forecast(db, user_id),
+        ttl=settings.CACHE_ML_RESULT_TTL,
+        soft_ttl=settings.CACHE_ML_SOFT_TTL,
+        refresh=_in_new_session(_compute_forecast, user_id),
+    )
+
+@router.get("/forecast")
+def get_spending_forecast(user_id: int, db: Session = Depends(get_db)):
+    return _cached_forecast(db, user_id)
 
 @router.get("/anomalies")
 def get_spending_anomalies(user_id: int, threshold: float = 2.0, db: Session = Depends(get_db)):
-    expenses = list_expenses(db, user_id)
-    prepared_data = _prepare_expenses(expenses)
-    anomalies = AnomalyDetector.detect_anomalies(prepared_data, threshold=threshold)
+    expenses = get_expense_columns(db, user_id)
+    anomalies = AnomalyDetector.detect_anomalies(expenses, threshold=threshold)
     
     return {
         "user_id": user_id,
@@ -69,76 +83,115 @@ def get_spending_anomalies(user_id: int, threshold: float = 2.0, db: Session = D
 def get_autonomous_actions(user_id: int, db: Session = Depends(get_db)):
     if not settings.AUTONOMOUS_ENABLED:
         raise HTTPException(status_code=503, detail="Autonomous features are disabled")
-    expenses = list_expenses(db, user_id)
-    budgets = list_budgets(db, user_id)
-    income = _get_user_income(db, user_id)
-    
-    total_monthly_budget = sum([b.limit_amount for b in budgets]) if budgets else 0.0
-    prepared_data = _prepare_expenses(expenses)
-    
-    actions = AutonomousEngine.generate_actions(prepared_data, total_monthly_budget, income)
+    snapshot = load_user_snapshot(db, user_id)
+    actions = AutonomousEngine.generate_actions(snapshot.expenses, snapshot.total_budget, snapshot.income)
     
     return {
         "user_id": user_id,
-        "current_total_budget": total_monthly_budget,
+        "current_total_budget": snapshot.total_budget,
         "autonomous_actions": actions
     }
 
 @router.get("/investment-simulator")
-def simulate_investments(principal: float, years: int = 1):
+def simulate_investments(principal: float, years: int = Query(1, ge=1, le=50),
+                         iterations: int = Query(1000, ge=100, le=1_000_000), seed: Optional[int] = None):
     if not settings.ENABLE_HEAVY_ML:
         raise HTTPException(status_code=503, detail="Investment simulation is disabled by feature flag")
+    # paths are simulated in bounded chunks, so memory does not grow with `iterations`
     return {
         "principal": principal,
-        "simulations": InvestmentOptimizer.simulate_monte_carlo(principal, years)
+        "simulations": InvestmentOptimizer.simulate_monte_carlo(
+            principal, years, iterations, InvestmentOptimizer.DEFAULT_SEED if seed is None else seed
+        )
     }
 
+def _compute_health_score(db: Session, user_id: int) -> Dict:
+    snapshot = load_user_snapshot(db, user_id)
+    return FinancialHealthScore.calculate(snapshot.expenses, snapshot.total_budget, snapshot.income)
+
+def _cached_health_score(db: Session, user_id: int) -> Dict:
+    return CacheManager.get_or_compute(
+        CacheManager.user_key("health_score", user_id),
+        lambda: _compute_health_score(db, user_id),
+        ttl=settings.CACHE_ML_RESULT_TTL,
+        soft_ttl=settings.CACHE_ML_SOFT_TTL,
+        refresh=_in_new_session(_compute_health_score, user_id),
+    )
+
 @router.get("/health-score")
 def get_health_score(user_id: int, db: Session = Depends(get_db)):
-    # 1. Try Cache
-    cache_key = f"health_score:{user_id}"
-    cached_res = CacheManager.get(cache_key)
-    if cached_res:
-        return cached_res
-        
-    expenses = list_expenses(db, user_id)
-    budgets = list_budgets(db, user_id)
-    income = _get_user_income(db, user_id)
-    total_monthly_budget = sum([b.limit_amount for b in budgets]) if budgets else 0.0
-    
-    prepared_data = _prepare_expenses(expenses)
-    result = FinancialHealthScore.calculate(prepared_data, total_monthly_budget, income)
-    
-    # 2. Store in Cache (30 min TTL)
-    CacheManager.set(cache_key, result, expire=1800)
-    return result
+    return _cached_health_score(db, user_id)
 
 @router.get("/model-metrics")
 def get_ml_metrics(user_id: int, db: Session = Depends(get_db)):
-    expenses = list_expenses(db, user_id)
-    prepared_data = _prepare_expenses(expenses)
-    return MetricsManager.calculate_performance(prepared_data)
+    return MetricsManager.calculate_performance_from_monthly_totals(get_monthly_totals(db, user_id))
 
 @router.post("/chat")
 def oracle_chat(user_id: int, query: str = Body(..., embed=True), db: Session = Depends(get_db)):
     if not settings.ENABLE_HEAVY_ML:
         raise HTTPException(status_code=503, detail="Chat advisor is disabled by feature flag")
-    expenses = list_expenses(db, user_id)
-    budgets = list_budgets(db, user_id)
-    income = _get_user_income(db, user_id)
-    total_monthly_budget = sum([b.limit_amount for b in budgets]) if budgets else 0.0
-    
-    prepared_data = _prepare_expenses(expenses)
-    return FinancialAdvisorChatbot.process_query(query, user_id, prepared_data, total_monthly_budget, income)
+    # Only the signals the intent needs are loaded: health and forecast are the
+    # cached /health-score and /forecast results, the anomaly count comes from the
+    # merchant baselines, and the 30-day window is pushed into SQL
+    since = datetime.now(timezone.utc) - timedelta(days=FinancialAdvisorChatbot.RECENT_WINDOW_DAYS)
+    sources = {
+        "expenses": lambda: get_expense_columns(db, user_id),
+        "profile": lambda: load_budget_and_income(db, user_id),
+        "recent_expenses": lambda: get_expense_columns(db, user_id, since=since),
+        "health": lambda: _cached_health_score(db, user_id),
+        "forecast": lambda: _cached_forecast(db, user_id).get(
+            "forecast_analysis", spendingForecaster.predict_from_monthly_totals({})
+        ),
+        "anomaly_count": lambda: anomaly_count(db, user_id),
+    }
+    return FinancialAdvisorChatbot.process_query(query, user_id, sources=sources)
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=float)}\n\n"
+
+@router.post("/chat/stream")
+def oracle_chat_stream(user_id: int, query: str = Body(..., embed=True)):
+    """
+    Server-sent events version of /chat: `intent` arrives before any data is
+    read, then `fact` and `answer` events as each signal is computed, then `done`.
+    """
+    if not settings.ENABLE_HEAVY_ML:
+        raise HTTPException(status_code=503, detail="Chat advisor is disabled by feature flag")
+
+    since = datetime.now(timezone.utc) - timedelta(days=FinancialAdvisorChatbot.RECENT_WINDOW_DAYS)
+    # own session: the body is streamed after the request's dependencies have exited
+    db = SessionLocal()
+
+    def load_recent():
+        return get_expense_columns(db, user_id, since=since)
+
+    def load_context():
+        snapshot = load_user_snapshot(db, user_id)
+        return snapshot.expenses, snapshot.total_budget, snapshot.income
+
+    def stream():
+        try:
+            for event, data in FinancialAdvisorChatbot.stream_query(query, user_id, load_recent, load_context):
+                yield _sse(event, data)
+        except Exception:
+            # headers are already sent; tell the client the stream ended early
+            logger.exception("Chat stream failed for user %s", user_id)
+            yield _sse("error", {"detail": "The advisor could not finish this answer."})
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/analytics")
 def get_visual_analytics(user_id: int, db: Session = Depends(get_db)):
-    expenses = list_expenses(db, user_id)
-    prepared_data = _prepare_expenses(expenses)
-    
-    forecast_vs_actual = AnalyticsEngine.get_forecast_vs_actual(prepared_data)
-    sim_data = InvestmentOptimizer.simulate_monte_carlo(10000, 1) # $10k principal
-    monte_carlo_distribution = AnalyticsEngine.get_monte_carlo_distribution(sim_data)
+    forecast_vs_actual = analytics_service.forecast_vs_actual(db, user_id)
+    # seeded, so repeat requests reuse the cached simulation and its memoized histograms
+    simulation = InvestmentOptimizer.simulate(years=1)
+    monte_carlo_distribution = AnalyticsEngine.get_monte_carlo_distribution(simulation)
     
     return {
         "user_id": user_id,
@@ -0,0 +1,166 @@
+"""
+Binary encoding of cached values.
+
+Encoded values start with a 3-byte header: b"\x00", a serializer tag and a
+compression tag. Values written by older releases are plain JSON text and
+never start with b"\x00", so both formats can be read side by side.
+"""
+import json
+import zlib
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # optional
+    lz4_frame = None
+
+MARKER = b"\x00"
+HEADER_SIZE = 3
+
+
+class CodecError(ValueError):
+    pass
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+# tag -> (name, dumps, loads, available)
+SERIALIZERS = {
+    b"j": ("json", _json_dumps, json.loads, True),
+    b"o": ("orjson", _orjson_dumps, orjson.loads if orjson else None, orjson is not None),
+    b"m": ("msgpack", _msgpack_dumps, _msgpack_loads, msgpack is not None),
+}
+
+COMPRESSORS = {
+    b"n": ("none", None, None, True),
+    b"z": ("zlib", lambda b: zlib.compress(b, 6), zlib.decompress, True),
+    b"s": ("zstd",
+           (lambda b: zstandard.ZstdCompressor(level=3).compress(b)) if zstandard else None,
+           (lambda b: zstandard.ZstdDecompressor().decompress(b)) if zstandard else None,
+           zstandard is not None),
+    b"l": ("lz4",
+           lz4_frame.compress if lz4_frame else None,
+           lz4_frame.decompress if lz4_frame else None,
+           lz4_frame is not None),
+}
+
+
+def _tag_for(table: dict, name: str) -> bytes:
+    for tag, entry in table.items():
+        if entry[0] == name:
+            return tag
+    raise CodecError(f"Unknown cache codec '{name}'")
+
+
+def _tag(table: dict, name: str) -> bytes:
+    tag = _tag_for(table, name)
+    if not table[tag][3]:
+        raise CodecError(f"Cache codec '{name}' is not installed")
+    return tag
+
+
+def _first_available(table: dict, names) -> bytes:
+    for name in names:
+        tag = _tag_for(table, name)
+        if table[tag][3]:
+            return tag
+    raise CodecError(f"None of {names} is installed")
+
+
+class CacheCodec:
+    """
+    Encodes values with the configured serializer and compresses payloads of
+    at least `compress_min_bytes` when that makes them smaller.
+
+    `serializer="legacy"` writes untagged JSON that releases without this codec
+    can read; use it while rolling out, then switch to "auto".
+    """
+
+    def __init__(self, serializer: str = "auto", compression: str = "auto", compress_min_bytes: int = 1024):
+        self.legacy = serializer == "legacy"
+        if serializer in ("auto", "legacy"):
+            self._serializer = _first_available(SERIALIZERS, ("orjson", "msgpack", "json"))
+        else:
+            self._serializer = _tag(SERIALIZERS, serializer)
+        if compression == "auto":
+            self._compression = _first_available(COMPRESSORS, ("zstd", "lz4", "zlib"))
+        else:
+            self._compression = _tag(COMPRESSORS, compression)
+        self.compress_min_bytes = compress_min_bytes
+
+    @property
+    def name(self) -> str:
+        if self.legacy:
+            return "legacy-json"
+        return f"{SERIALIZERS[self._serializer][0]}+{COMPRESSORS[self._compression][0]}"
+
+    def encode(self, value: Any) -> bytes:
+        if self.legacy:
+            return json.dumps(value).encode()
+        tag = self._serializer
+        try:
+            body = SERIALIZERS[tag][1](value)
+        except TypeError:
+            tag = b"j"  # types the binary serializers reject still go through stdlib json
+            body = _json_dumps(value)
+        compression = b"n"
+        if self._compression != b"n" and len(body) >= self.compress_min_bytes:
+            packed = COMPRESSORS[self._compression][1](body)
+            if len(packed) < len(body):
+                body, compression = packed, self._compression
+        return MARKER + tag + compression + body
+
+    @staticmethod
+    def decode(data: Optional[bytes]) -> Any:
+        """Decode a tagged value, or a legacy JSON value; raises CodecError if unreadable."""
+        if data is None:
+            return None
+        if isinstance(data, str):
+            data = data.encode()
+        if not data.startswith(MARKER):
+            try:
+                return json.loads(data)
+            except ValueError as e:
+                raise CodecError(str(e)) from e
+        if len(data) < HEADER_SIZE:
+            raise CodecError("Truncated cache value")
+        serializer = SERIALIZERS.get(data[1:2])
+        compressor = COMPRESSORS.get(data[2:3])
+        if not serializer or not compressor or not serializer[3] or not compressor[3]:
+            raise CodecError(f"Unsupported cache value format {data[:HEADER_SIZE]!r}")
+        body = data[HEADER_SIZE:]
+        try:
+            if compressor[2] is not None:
+                body = compressor[2](body)
+            return serializer[2](body)
+        except Exception as e:
+            raise CodecError(str(e)) from e
@@ -1,37 +1,334 @@
-import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
 import redis
+from app.core.cache_codec import CacheCodec, CodecError
 from app.core.config import get_settings
 
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache with per-entry TTL.
+    Values are stored encoded so the byte cap is exact and callers never
+    share (and mutate) the cached object.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, payload)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def set(self, key: str, payload: bytes, ttl: float):
+        size = len(payload)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if ttl <= 0 or size > self.max_bytes or self.max_entries <= 0:
+                return
+            self._entries[key] = (self._clock() + ttl, payload)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: str):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+class CircuitBreaker:
+    """Skips a failing backend for `cooldown` seconds after `threshold` consecutive failures."""
+
+    def __init__(self, threshold: int, cooldown: float, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+
+    def allow(self) -> bool:
+        # once the cooldown has passed the next call is let through as a probe
+        return self._clock() >= self._open_until
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._open_until = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._open_until = self._clock() + self.cooldown
+
+    @property
+    def is_open(self) -> bool:
+        return not self.allow()
+
+
 class CacheManager:
     """
-    Centralized caching utility using Redis for high-performance retrieval 
+    Centralized caching utility using Redis for high-performance retrieval
     of precomputed ML results like health scores and forecasts.
+
+    Reads go to a per-process LRU (L1) first and to Redis (L2) on a miss.
+    Both tiers hold values encoded by `CacheCodec` (tagged binary, optionally
+    compressed); untagged JSON written by older releases is still readable.
+    Redis errors trip a circuit breaker so an unreachable Redis costs nothing
+    until the cooldown expires.
+
+    Per-user results are keyed by the user's data version (`user_key`), which
+    every write bumps, so they can be cached for days without going stale.
+
+    `get_or_compute` adds single-flight recomputation and stale-while-revalidate.
     """
-    
+
     settings = get_settings()
-    _redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    _redis = redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=False,
+        socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT,
+        socket_timeout=settings.CACHE_REDIS_TIMEOUT,
+    )
+    _local = LocalCache(settings.CACHE_L1_MAX_ENTRIES, settings.CACHE_L1_MAX_BYTES)
+    _breaker = CircuitBreaker(settings.CACHE_REDIS_FAILURE_THRESHOLD, settings.CACHE_REDIS_COOLDOWN)
+    _codec = CacheCodec(settings.CACHE_SERIALIZER, settings.CACHE_COMPRESSION, settings.CACHE_COMPRESS_MIN_BYTES)
+    # versions bumped while Redis was unreachable: the local fallback and the
+    # users whose Redis counter still has to be incremented
+    _fallback_versions = {}
+    _pending_bumps = set()
+    # single-flight: key -> Future of the computation in progress in this process
+    _inflight = {}
+    _inflight_lock = threading.Lock()
+    _refresher = ThreadPoolExecutor(max_workers=settings.CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+
+    @classmethod
+    def _l1_ttl(cls, ttl: float) -> float:
+        return min(ttl, cls.settings.CACHE_L1_TTL) if cls.settings.CACHE_L1_ENABLED else 0
 
     @classmethod
     def set(cls, key: str, value: dict, expire: int = 3600):
-        """Store a dict in Redis with a TTL in seconds."""
+        """Store a dict in both tiers with a TTL in seconds."""
+        payload = cls._codec.encode(value)
+        cls._local.set(key, payload, cls._l1_ttl(expire))
+        if not cls._breaker.allow():
+            return
         try:
-            cls._redis.setex(key, expire, json.dumps(value))
-        except redis.ConnectionError:
-            pass # Fail gracefully if Redis is down
+            cls._redis.setex(key, expire, payload)
+            cls._breaker.record_success()
+        except redis.RedisError:
+            cls._breaker.record_failure()  # Fail gracefully if Redis is down
 
     @classmethod
     def get(cls, key: str) -> dict:
-        """Retrieve a cached dict from Redis."""
+        """Retrieve a cached dict, from process memory when possible."""
+        payload = cls._local.get(key)
+        if payload is None and cls._breaker.allow():
+            try:
+                pipe = cls._redis.pipeline(transaction=False)
+                pipe.get(key)
+                pipe.pttl(key)
+                payload, pttl = pipe.execute()
+                cls._breaker.record_success()
+            except redis.RedisError:
+                cls._breaker.record_failure()
+                return None
+            if payload and pttl and pttl > 0:
+                # never keep a local copy longer than Redis would
+                cls._local.set(key, payload, cls._l1_ttl(pttl / 1000))
         try:
-            data = cls._redis.get(key)
-            return json.loads(data) if data else None
-        except (redis.ConnectionError, json.JSONDecodeError):
+            return cls._codec.decode(payload) if payload else None
+        except CodecError:
             return None
 
     @classmethod
     def delete(cls, key: str):
         """Remove a key from cache."""
+        cls._local.delete(key)
+        if not cls._breaker.allow():
+            return
         try:
             cls._redis.delete(key)
-        except redis.ConnectionError:
-            pass
+            cls._breaker.record_success()
+        except redis.RedisError:
+            cls._breaker.record_failure()
+
+    @classmethod
+    def _version_key(cls, user_id: int) -> str:
+        return f"data_version:{user_id}"
+
+    @classmethod
+    def data_version(cls, user_id: int) -> int:
+        """
+        Current data version of a user. Workers re-read it from Redis at most
+        every CACHE_VERSION_L1_TTL seconds, which bounds cross-worker staleness.
+        """
+        key = cls._version_key(user_id)
+        cached = cls._local.get(key)
+        if cached is not None:
+            return int(cached)
+        version = None
+        if cls._breaker.allow():
+            try:
+                if user_id in cls._pending_bumps:
+                    version = cls._redis.incr(key)
+                    cls._pending_bumps.discard(user_id)
+                else:
+                    version = int(cls._redis.get(key) or 0)
+                cls._breaker.record_success()
+            except redis.RedisError:
+                cls._breaker.record_failure()
+        if version is None:
+            version = cls._fallback_versions.get(user_id, 0)
+        cls._local.set(key, str(version).encode(), cls.settings.CACHE_VERSION_L1_TTL)
+        return version
+
+    @classmethod
+    def bump_data_version(cls, user_id: int) -> int:
+        """Invalidate every cached result of a user; call after committing a write to their data."""
+        key = cls._version_key(user_id)
+        version = None
+        if cls._breaker.allow():
+            try:
+                version = cls._redis.incr(key)
+                cls._breaker.record_success()
+            except redis.RedisError:
+                cls._breaker.record_failure()
+        if version is None:
+            version = max(cls._fallback_versions.get(user_id, 0), cls.data_version(user_id)) + 1
+            cls._fallback_versions[user_id] = version
+            cls._pending_bumps.add(user_id)
+        cls._local.set(key, str(version).encode(), cls.settings.CACHE_VERSION_L1_TTL)
+        return version
+
+    @classmethod
+    def user_key(cls, name: str, user_id: int) -> str:
+        """
+        Cache key for a per-user result, e.g. `forecast:7:v12`.
+        Build it before loading the inputs so a concurrent write can only make
+        the stored entry unreachable, never stale.
+        """
+        return f"{name}:{user_id}:v{cls.data_version(user_id)}"
+
+    @classmethod
+    def get_or_compute(cls, key: str, compute: Callable[[], dict], ttl: int,
+                       soft_ttl: Optional[int] = None, refresh: Optional[Callable[[], dict]] = None) -> dict:
+        """
+        Return the cached value of `key`, computing it at most once per process.
+
+        Concurrent misses wait for the single computation already in flight.
+        Once an entry is older than `soft_ttl` it is still served, and one
+        background refresh (`refresh`, or `compute`) replaces it. `refresh` runs
+        on another thread after the request ends, so it must not use the
+        request's DB session.
+        """
+        entry = cls.get(key)
+        if isinstance(entry, dict) and "fresh_until" in entry:
+            if entry["fresh_until"] <= time.time():
+                cls._refresh_in_background(key, refresh or compute, ttl, soft_ttl)
+            return entry["value"]
+
+        with cls._inflight_lock:
+            future = cls._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = cls._inflight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            value = cls._compute_and_store(key, compute, ttl, soft_ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with cls._inflight_lock:
+                cls._inflight.pop(key, None)
+
+    @classmethod
+    def _compute_and_store(cls, key: str, compute: Callable[[], dict], ttl: int, soft_ttl: Optional[int]) -> dict:
+        value = compute()
+        fresh_for = soft_ttl if soft_ttl is not None else ttl
+        cls.set(key, {"value": value, "fresh_until": time.time() + fresh_for}, expire=ttl)
+        return value
+
+    @classmethod
+    def _refresh_in_background(cls, key: str, compute: Callable[[], dict], ttl: int, soft_ttl: Optional[int]):
+        with cls._inflight_lock:
+            if key in cls._inflight:
+                return
+            future = cls._inflight[key] = Future()
+        # other workers may hold the same stale entry; only one of them refreshes it
+        if not cls._acquire_refresh_lock(key, ttl=max(1, min(ttl, 60))):
+            with cls._inflight_lock:
+                cls._inflight.pop(key, None)
+            future.cancel()
+            return
+
+        def run():
+            try:
+                future.set_result(cls._compute_and_store(key, compute, ttl, soft_ttl))
+            except Exception as e:
+                logger.exception("Background refresh of %s failed: %s", key, e)
+                future.set_exception(e)
+            finally:
+                with cls._inflight_lock:
+                    cls._inflight.pop(key, None)
+
+        cls._refresher.submit(run)
+
+    @classmethod
+    def _acquire_refresh_lock(cls, key: str, ttl: int) -> bool:
+        if not cls._breaker.allow():
+            return True  # without Redis the in-process single-flight is all we have
+        try:
+            acquired = cls._redis.set(f"refresh_lock:{key}", "1", nx=True, ex=ttl)
+            cls._breaker.record_success()
+            return bool(acquired)
+        except redis.RedisError:
+            cls._breaker.record_failure()
+            return True
+
+    @classmethod
+    def stats(cls) -> dict:
+        return {"l1": cls._local.stats(), "codec": cls._codec.name, "redis_circuit_open": cls._breaker.is_open}
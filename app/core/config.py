@@ -9,11 +9,44 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     REDIS_URL: str = "redis://redis:6379/0"
 
+    # Database connection pool (ignored for SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 disables recycling
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # PostgreSQL only; 0 disables
+
+    # In-process cache (L1) in front of Redis
+    CACHE_L1_ENABLED: bool = True
+    CACHE_L1_TTL: int = 300  # seconds; upper bound on how long a worker serves its local copy
+    CACHE_L1_MAX_ENTRIES: int = 2048
+    CACHE_L1_MAX_BYTES: int = 32 * 1024 * 1024
+    CACHE_REDIS_TIMEOUT: float = 0.25  # seconds, connect and read
+    CACHE_REDIS_FAILURE_THRESHOLD: int = 3
+    CACHE_REDIS_COOLDOWN: float = 30.0  # seconds Redis is skipped after repeated failures
+    CACHE_VERSION_L1_TTL: float = 5.0  # seconds a worker trusts its copy of a user's data version
+    CACHE_ML_RESULT_TTL: int = 7 * 24 * 3600  # per-user ML results; invalidated by data version
+    CACHE_ML_SOFT_TTL: int = 3600  # after this a cached result is served stale while one refresh runs
+    CACHE_REFRESH_WORKERS: int = 2
+    # Cache value encoding: auto | msgpack | orjson | json | legacy (untagged JSON).
+    # Workers from before the binary codec read Redis as text and fail on tagged
+    # values, so keep "legacy" until every worker runs this release, then switch
+    # to "auto" (new workers read both formats either way).
+    CACHE_SERIALIZER: str = "legacy"
+    CACHE_COMPRESSION: str = "auto"  # auto | zstd | lz4 | zlib | none
+    CACHE_COMPRESS_MIN_BYTES: int = 1024
+
     SECRET_KEY: str = "change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ADMIN_API_KEY: str = ""
 
+    # DecisionEngine: run the ML engines concurrently, each with its own deadline
+    DECISION_ENGINE_CONCURRENT: bool = True
+    DECISION_ENGINE_WORKERS: int = 4
+    DECISION_ENGINE_TIMEOUT: float = 2.0  # seconds per engine; slower engines are reported as degraded
+
     # Feature flags
     ENABLE_HEAVY_ML: bool = True
     AUTONOMOUS_ENABLED: bool = True
@@ -1,29 +1,90 @@
-from typing import Any, Dict, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
 import logging
+import threading
+import time
+
+from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 
 class DecisionEngine:
-    """Consumes ML outputs and produces structured decision signals."""
+    """Consumes ML outputs and produces structured decision signals.
+
+    By default (DECISION_ENGINE_CONCURRENT) the engines run concurrently on a
+    shared, bounded thread pool. Each engine gets its own deadline
+    (DECISION_ENGINE_TIMEOUT, or `timeouts[name]`), counted from when it
+    starts running; an engine that misses it, or is still queued after that
+    long, keeps its default output and is reported as degraded instead of
+    holding up the response. Per-engine status, run time (`latency_ms`) and
+    time spent waiting for a worker (`queue_ms`) are recorded in
+    `context["engines"]`.
+    """
+
+    ENGINES = ("forecast", "anomalies", "investment", "health_score")
+
+    settings = get_settings()
+    _pool = None
+    _pool_lock = threading.Lock()
 
-    def __init__(self):
+    def __init__(self, concurrent: Optional[bool] = None, timeouts: Optional[Dict[str, float]] = None):
+        self.concurrent = self.settings.DECISION_ENGINE_CONCURRENT if concurrent is None else concurrent
+        self.timeouts = timeouts or {}
         # lazy imports to avoid hard failures in restricted environments
         try:
             from app.ml.forecaster import spendingForecaster
             from app.ml.anomaly_detector import AnomalyDetector
             from app.ml.investment_optimizer import InvestmentOptimizer
             from app.ml.health_score import FinancialHealthScore
+            from app.ml.feature_frame import FinancialFeatureFrame
 
             self._forecaster = spendingForecaster
             self._anomaly = AnomalyDetector
             self._invest = InvestmentOptimizer
             self._health = FinancialHealthScore
+            self._frame = FinancialFeatureFrame
         except Exception:
             self._forecaster = None
             self._anomaly = None
             self._invest = None
             self._health = None
+            self._frame = None
+
+    @classmethod
+    def _executor(cls) -> ThreadPoolExecutor:
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(max_workers=cls.settings.DECISION_ENGINE_WORKERS,
+                                               thread_name_prefix="decision-engine")
+            return cls._pool
+
+    def _timeout(self, name: str) -> float:
+        return self.timeouts.get(name, self.settings.DECISION_ENGINE_TIMEOUT)
+
+    def _forecast(self, expenses, profile):
+        if self._forecaster:
+            return self._forecaster.predict_next_month(expenses)
+        # fallback simple forecast
+        total = sum(e.get("amount", 0) for e in expenses)
+        return {"monthly_forecast": total / max(1, len(expenses))}
+
+    def _anomalies(self, expenses, profile):
+        return self._anomaly.detect_anomalies(expenses) if self._anomaly else []
+
+    def _investment(self, expenses, profile):
+        return self._invest.optimize(profile) if self._invest else None
+
+    def _health_score(self, expenses, profile):
+        return self._health.calculate_financial_health(expenses, profile) if self._health else None
+
+    def _tasks(self) -> Dict[str, Callable]:
+        return {
+            "forecast": self._forecast,
+            "anomalies": self._anomalies,
+            "investment": self._investment,
+            "health_score": self._health_score,
+        }
 
     def evaluate(self, expenses: List[Dict[str, Any]], profile: Dict[str, Any]) -> Dict[str, Any]:
         out = {
@@ -33,40 +94,96 @@ class DecisionEngine:
             "health_score": None,
             "context": {},
         }
+        if self._frame:
+            # amounts, merchants and months are derived once and shared by every engine
+            try:
+                expenses = self._frame.of(expenses)
+            except Exception as e:
+                logger.warning("Could not build feature frame, engines get raw expenses: %s", e)
 
-        try:
-            if self._forecaster:
-                f = self._forecaster.predict_next_month(expenses)
-                out["forecast"] = f
-            else:
-                # fallback simple forecast
-                total = sum(e.get("amount", 0) for e in expenses)
-                out["forecast"] = {"monthly_forecast": total / max(1, len(expenses))}
-        except Exception as e:
-            logger.exception("Forecasting failed: %s", e)
+        if self.concurrent:
+            engines = self._run_concurrently(expenses, profile, out)
+        else:
+            engines = self._run_sequentially(expenses, profile, out)
 
-        try:
-            if self._anomaly:
-                an = self._anomaly.detect_anomalies(expenses)
-                out["anomalies"] = an
-            else:
-                out["anomalies"] = []
-        except Exception as e:
-            logger.exception("Anomaly detection failed: %s", e)
-
-        try:
-            if self._invest:
-                inv = self._invest.optimize(profile)
-                out["investment"] = inv
-        except Exception as e:
-            logger.exception("Investment optimizer failed: %s", e)
+        out["context"]["mode"] = "concurrent" if self.concurrent else "sequential"
+        out["context"]["engines"] = engines
+        out["context"]["degraded"] = [name for name, info in engines.items() if info["status"] == "degraded"]
+        return out
 
-        try:
-            if self._health:
-                hs = self._health.calculate_financial_health(expenses, profile)
-                out["health_score"] = hs
-        except Exception:
+    def _record(self, out: Dict, name: str, result=None, error: Optional[BaseException] = None) -> str:
+        if error is None:
+            out[name] = result
+            return "ok"
+        if name == "health_score":
             # some repos expose different methods for health — tolerate failures
-            out["health_score"] = None
+            out[name] = None
+        else:
+            logger.error("%s engine failed: %s", name, error, exc_info=error)
+        return "error"
 
-        return out
+    def _run_sequentially(self, expenses, profile, out: Dict) -> Dict[str, Dict]:
+        engines = {}
+        for name, task in self._tasks().items():
+            started = time.perf_counter()
+            try:
+                status = self._record(out, name, task(expenses, profile))
+            except Exception as e:
+                status = self._record(out, name, error=e)
+            engines[name] = {"status": status, "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                             "queue_ms": 0.0}
+        return engines
+
+    def _run_concurrently(self, expenses, profile, out: Dict) -> Dict[str, Dict]:
+        pool = self._executor()
+        submitted = time.perf_counter()
+        started_at = {}
+        finished_at = {}
+
+        def timed(name, task):
+            started_at[name] = time.perf_counter()
+            try:
+                return task(expenses, profile)
+            finally:
+                finished_at[name] = time.perf_counter()
+
+        def deadline(name):
+            # an engine's budget runs from when it starts, so time spent queued
+            # behind other requests on the shared pool does not count against
+            # it; one still queued after a whole budget is given up
+            return started_at.get(name, submitted) + self._timeout(name)
+
+        futures = {name: pool.submit(timed, name, task) for name, task in self._tasks().items()}
+        pending = dict(futures)
+        statuses = {}
+        while pending:
+            for name, future in list(pending.items()):
+                if future.done():
+                    del pending[name]
+                    error = future.exception()
+                    statuses[name] = self._record(out, name, future.result() if error is None else None, error)
+                elif deadline(name) <= time.perf_counter():
+                    del pending[name]
+                    # a queued task is dropped so it never takes a worker; a running
+                    # one cannot be interrupted, it finishes in the background and
+                    # its result is discarded
+                    future.cancel()
+                    logger.warning("%s engine missed its %.2fs deadline", name, self._timeout(name))
+                    statuses[name] = "degraded"
+            if pending:
+                next_deadline = min(deadline(name) for name in pending)
+                wait(list(pending.values()), timeout=max(0.0, next_deadline - time.perf_counter()),
+                     return_when=FIRST_COMPLETED)
+
+        now = time.perf_counter()
+        engines = {}
+        for name in futures:
+            # latency is the engine's own run time (so far, if it is still running);
+            # time spent waiting for a worker is reported separately
+            start = started_at.get(name)
+            engines[name] = {
+                "status": statuses[name],
+                "latency_ms": round((finished_at.get(name, now) - start) * 1000, 2) if start is not None else 0.0,
+                "queue_ms": round(((start if start is not None else now) - submitted) * 1000, 2),
+            }
+        return engines
@@ -2,7 +2,7 @@ from fastapi import FastAPI, Depends
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse, JSONResponse
 from contextlib import asynccontextmanager
-from app.core.database import engine, SessionLocal
+from app.core.database import engine, SessionLocal, dispose_async_engine
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from app.models.user import Base, User
@@ -50,7 +50,8 @@ async def lifespan(app: FastAPI):
 	except Exception:
 		pass
 	yield
-	# Teardown: nothing for now
+	# Teardown: close pooled async connections
+	await dispose_async_engine()
 
 
 app = FastAPI(lifespan=lifespan)
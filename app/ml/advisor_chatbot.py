@@ -1,107 +1,313 @@
-from typing import List, Dict, Optional
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from app.ml.forecaster import spendingForecaster
 from app.ml.anomaly_detector import AnomalyDetector
 from app.ml.investment_optimizer import InvestmentOptimizer
 from app.ml.health_score import FinancialHealthScore
+from app.ml.expense_columns import ExpenseColumns, expense_amounts
+from app.ml.feature_frame import FinancialFeatureFrame
 
-class FinancialAdvisorChatbot:
+# (intent, trigger keywords, ChatSignals its answer reads), in matching priority order
+INTENTS = (
+    ("HEALTH_CHECK", ("how am i", "health", "score", "status"), ("health",)),
+    ("FORECAST", ("forecast", "predict", "next month", "future"), ("forecast_result", "monthly_budget", "context")),
+    ("INVESTMENT", ("invest", "save", "money", "portfolio"), ("health", "forecast_result", "monthly_budget")),
+    ("EXPENSES", ("expense", "spent", "transaction"), ("expenses", "context")),
+    ("BUDGET", ("budget", "limit", "cap"), ("forecast_result", "monthly_budget", "context")),
+    ("ADVICE", ("tip", "advice", "help", "guide"), ("health",)),
+)
+GENERAL_INTENT = "GENERAL"
+
+_KEYWORD_PRIORITY = {kw: i for i, (_, keywords, _) in enumerate(INTENTS) for kw in keywords}
+# one pass over the query; the lookahead reports overlapping keywords too, and
+# keywords are listed in priority order so the best one wins at each position
+_INTENT_PATTERN = re.compile("(?=(" + "|".join(re.escape(kw) for kw in _KEYWORD_PRIORITY) + "))")
+
+
+class ChatSignals:
     """
-    Context-Aware AI Financial Advisor Chatbot.
-    Retrieves real-time spending, forecast, and health data to construct precise recommendations.
+    Financial context for one chat query. Every signal is computed on first
+    use and memoized, so a query only pays for the signals its answer reads.
+
+    `sources` maps a signal to a loader that supplies it instead, e.g. from
+    SQL or the cached engine results: "expenses", "profile" (as
+    `(monthly_budget, income)`), "recent_expenses", "health", "forecast"
+    and "anomaly_count". Each loader is called at most once.
     """
 
+    def __init__(self, window_days: int, sources: Dict[str, Callable[[], Any]]):
+        self.window_days = window_days
+        self._sources = sources
+
     @classmethod
-    def process_query(cls, query: str, user_id: int, expenses: List[Dict], monthly_budget: float, income: float) -> Dict:
-        """
-        Processes a user query by fetching full financial context.
-        """
-        query_lower = query.lower()
-        
-        # 1. Gather Full Financial Context
-        health = FinancialHealthScore.calculate(expenses, monthly_budget, income)
-        forecast_result = spendingForecaster.predict_next_month(expenses)
-        forecast = forecast_result['monthly_forecast']
+    def from_data(cls, expenses, monthly_budget: float, income: float, window_days: int,
+                  recent_expenses: Optional[Union[List[Dict], ExpenseColumns]] = None) -> "ChatSignals":
+        sources = {"expenses": lambda: expenses, "profile": lambda: (monthly_budget, income)}
+        if recent_expenses is not None:
+            sources["recent_expenses"] = lambda: recent_expenses
+        return cls(window_days, sources)
+
+    def _load(self, name: str):
+        source = self._sources.get(name)
+        return source() if source is not None else None
+
+    def build(self, names: Iterable[str]) -> None:
+        """Compute the named signals up front, e.g. those an intent declares."""
+        for name in names:
+            getattr(self, name)
+
+    def computed(self, name: str) -> bool:
+        return name in self.__dict__
+
+    @cached_property
+    def expenses(self) -> FinancialFeatureFrame:
+        return FinancialFeatureFrame.of(self._sources["expenses"]())
+
+    @cached_property
+    def _profile(self) -> Tuple[float, float]:
+        return self._sources["profile"]()
+
+    @property
+    def monthly_budget(self) -> float:
+        return self._profile[0]
+
+    @property
+    def income(self) -> float:
+        return self._profile[1]
+
+    @cached_property
+    def health(self) -> Dict:
+        health = self._load("health")
+        if health is None:
+            health = FinancialHealthScore.calculate(self.expenses, self.monthly_budget, self.income)
+        return health
 
+    @cached_property
+    def forecast_result(self) -> Dict:
+        forecast_result = self._load("forecast")
+        if forecast_result is None:
+            forecast_result = spendingForecaster.predict_next_month(self.expenses)
+        return forecast_result
+
+    @property
+    def forecast(self) -> float:
+        return self.forecast_result['monthly_forecast']
+
+    @cached_property
+    def recent_expenses(self):
+        recent = self._load("recent_expenses")
+        if recent is not None:
+            return recent
         # Filter to last 30 days only for context
-        from datetime import datetime, timedelta, timezone
-        now = datetime.now(timezone.utc)
-        cutoff = now - timedelta(days=30)
-        recent_expenses = []
-        for e in expenses:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=self.window_days)
+        recent = []
+        for e in self.expenses:
             ts = e['created_at']
             if ts is not None:
                 if hasattr(ts, 'tzinfo') and ts.tzinfo is None:
                     ts = ts.replace(tzinfo=timezone.utc)
                 if ts >= cutoff:
-                    recent_expenses.append(e)
-        
-        total_spent_30d = sum(e['amount'] for e in recent_expenses) if recent_expenses else sum(e['amount'] for e in expenses)
-        
-        context_prompt = (
-            f"In the last 30 days you spent ${round(total_spent_30d, 2)}. "
-            f"Forecast predicts ${round(forecast, 2)} spend next month ({forecast_result['trend']} trend, {forecast_result['confidence_level']*100:.0f}% confidence). "
-            f"Financial Health Score: {health['score']}/100."
+                    recent.append(e)
+        return recent
+
+    @cached_property
+    def total_spent_30d(self) -> float:
+        recent = self.recent_expenses
+        return float(expense_amounts(recent).sum()) if recent else self.expenses.total
+
+    @cached_property
+    def context(self) -> str:
+        forecast_result = self.forecast_result
+        return (
+            f"In the last 30 days you spent ${round(self.total_spent_30d, 2)}. "
+            f"Forecast predicts ${round(self.forecast, 2)} spend next month ({forecast_result['trend']} trend, {forecast_result['confidence_level']*100:.0f}% confidence). "
+            f"Financial Health Score: {self.health['score']}/100."
         )
 
-        response = ""
-        intent_detected = ""
+    @cached_property
+    def anomalies(self) -> List[Dict]:
+        return AnomalyDetector.detect_anomalies(self.expenses)
 
-        # 2. Logic-based response generation (Simulating LLM routing)
-        if any(w in query_lower for w in ["how am i", "health", "score", "status"]):
-            intent_detected = "HEALTH_CHECK"
-            recs = health.get('recommendations', [])
-            rec_text = recs[0] if recs else 'Keep it up — you are doing great!'
-            response = f"Your Financial Health Score is {health.get('score', 'N/A')} ({health.get('status', 'Unknown')}). {rec_text}"
+    @cached_property
+    def anomaly_count(self) -> int:
+        # a scan that already ran is exact; otherwise prefer the cheap source
+        if not self.computed("anomalies"):
+            count = self._load("anomaly_count")
+            if count is not None:
+                return int(count)
+        return len(self.anomalies)
 
-        elif any(w in query_lower for w in ["forecast", "predict", "next month", "future"]):
-            intent_detected = "FORECAST"
-            diff = forecast - monthly_budget
-            if diff > 0:
-                response = f"Forecast predicts you'll overspend by ${round(diff, 2)}. {context_prompt} I suggest locking non-essential categories."
-            else:
-                response = f"You are on track! Forecast predicts ${round(forecast, 2)} spend, leaving a surplus of ${round(abs(diff), 2)}."
+    def engine_output(self) -> Dict:
+        """Engine results for the response, read from the sources where given."""
+        return {
+            "health_score": self.health.get('score', 50),
+            "forecast": round(self.forecast, 2),
+            "anomalies_detected": self.anomaly_count,
+        }
 
-        elif any(w in query_lower for w in ["invest", "save", "money", "portfolio"]):
-            intent_detected = "INVESTMENT"
-            surplus = monthly_budget - forecast
-            advice = InvestmentOptimizer.suggest_allocation(max(0, surplus))
-            response = f"With your health score of {health.get('score', 'N/A')}, I recommend: {advice.get('action', 'diversify your portfolio')}"
 
-        elif any(w in query_lower for w in ["expense", "spent", "transaction"]):
-            intent_detected = "EXPENSES"
-            top_cat = "various"
-            if expenses:
-                cats = [e['category'] for e in expenses]
-                top_cat = max(set(cats), key=cats.count)
-            response = f"You've logged {len(expenses)} transactions recently. Your most frequent category is '{top_cat}'. {context_prompt}"
+class FinancialAdvisorChatbot:
+    """
+    Context-Aware AI Financial Advisor Chatbot.
+    Retrieves real-time spending, forecast, and health data to construct precise recommendations.
+    """
 
-        elif any(w in query_lower for w in ["budget", "limit", "cap"]):
-            intent_detected = "BUDGET"
-            utilization = ((forecast / monthly_budget) * 100) if monthly_budget > 0 else 0
-            response = f"Your total monthly budget is set at ${monthly_budget}. You're currently projected to utilize {utilization:.1f}% of it. {context_prompt}"
+    RECENT_WINDOW_DAYS = 30
 
-        elif any(w in query_lower for w in ["tip", "advice", "help", "guide"]):
-            intent_detected = "ADVICE"
-            response = f"Financial Tip: Consider the 50/30/20 rule. Allocate 50% to needs, 30% to wants, and 20% to savings. Your current health score is {health['score']}, meaning you have a {health['status']} foundation."
+    @classmethod
+    def detect_intent(cls, query: str) -> str:
+        best = None
+        for match in _INTENT_PATTERN.finditer(query.lower()):
+            priority = _KEYWORD_PRIORITY[match.group(1)]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return INTENTS[best][0] if best is not None else GENERAL_INTENT
 
+    @classmethod
+    def signals_for(cls, intent: str) -> tuple:
+        """Signals an intent's answer reads, as `ChatSignals` attribute names."""
+        for name, _, signals in INTENTS:
+            if name == intent:
+                return signals
+        return ()
+
+    @classmethod
+    def process_query(cls, query: str, user_id: int,
+                      expenses: Optional[Union[List[Dict], ExpenseColumns]] = None,
+                      monthly_budget: float = 0.0, income: float = 0.0,
+                      recent_expenses: Optional[Union[List[Dict], ExpenseColumns]] = None,
+                      sources: Optional[Dict[str, Callable[[], Any]]] = None) -> Dict:
+        """
+        Matches the query's intent first and then builds only the signals that
+        intent declares in INTENTS. Pass either the data itself or `sources`
+        (see `ChatSignals`); with sources, the envelope's health, forecast and
+        anomaly count come from them rather than from scanning `expenses`.
+        `recent_expenses` may be pre-filtered to the last RECENT_WINDOW_DAYS by the caller
+        (e.g. in SQL); otherwise the window is applied to `expenses` here.
+        """
+        if sources is None:
+            signals = ChatSignals.from_data(expenses, monthly_budget, income, cls.RECENT_WINDOW_DAYS,
+                                            recent_expenses)
         else:
-            intent_detected = "GENERAL"
-            generic_responses = [
-                f"I've analyzed your data. {context_prompt} How can I help you optimize your wealth today?",
-                f"I'm standing by to help. Currently, your health score is {health['score']}. Ask me about your 'forecast' or 'investment' strategy.",
-                f"Hello! Your data shows a {forecast_result['trend']} trend in spending. What specific area of your finances would you like to discuss?"
-            ]
-            import random
-            response = random.choice(generic_responses)
+            signals = ChatSignals(cls.RECENT_WINDOW_DAYS, sources)
+        intent_detected = cls.detect_intent(query)
+        signals.build(cls.signals_for(intent_detected))
+        response = cls.answer(intent_detected, signals)
 
         return {
             "query": query,
             "intent": intent_detected,
-            "context_injected": context_prompt,
+            "context_injected": signals.context,
             "response": response,
-            "recommendation_engine_output": {
-                "health_score": health.get('score', 50),
-                "forecast": round(forecast, 2),
-                "anomalies_detected": len(AnomalyDetector.detect_anomalies(expenses))
-            }
+            "recommendation_engine_output": signals.engine_output()
         }
+
+    @classmethod
+    def stream_query(cls, query: str, user_id: int,
+                     load_recent: Callable[[], Union[List[Dict], ExpenseColumns]],
+                     load_context: Callable[[], Tuple[Union[List[Dict], ExpenseColumns], float, float]]
+                     ) -> Iterator[Tuple[str, Dict]]:
+        """
+        Streaming variant of `process_query`, yielding `(event, data)` pairs as
+        soon as each part is ready: the intent (before any data is loaded),
+        the 30-day spend (after only the last RECENT_WINDOW_DAYS are loaded),
+        the answer, then the forecast, health and anomaly sentences, and
+        finally `done` with `process_query`'s payload minus the already-sent response.
+
+        `load_recent()` returns the expenses of the last RECENT_WINDOW_DAYS;
+        `load_context()` returns `(expenses, monthly_budget, income)` for the
+        full history and is only called once the 30-day spend has been sent.
+        """
+        intent = cls.detect_intent(query)
+        yield "intent", {"query": query, "intent": intent}
+
+        def spent_fact(total):
+            spent = round(total, 2)
+            return "fact", {"signal": "spent_30d", "value": spent, "text": f"In the last 30 days you spent ${spent}."}
+
+        recent_expenses = load_recent()
+        if recent_expenses:
+            yield spent_fact(float(expense_amounts(recent_expenses).sum()))
+
+        expenses, monthly_budget, income = load_context()
+        signals = ChatSignals.from_data(expenses, monthly_budget, income, cls.RECENT_WINDOW_DAYS, recent_expenses)
+        if not recent_expenses:
+            # nothing in the window: the summary falls back to the full history
+            yield spent_fact(signals.total_spent_30d)
+
+        yield "answer", {"response": cls.answer(intent, signals)}
+
+        forecast_result = signals.forecast_result
+        yield "fact", {"signal": "forecast", "value": round(signals.forecast, 2),
+                       "text": f"Forecast predicts ${round(signals.forecast, 2)} spend next month "
+                               f"({forecast_result['trend']} trend, {forecast_result['confidence_level']*100:.0f}% confidence)."}
+
+        health = signals.health
+        yield "fact", {"signal": "health", "value": health['score'],
+                       "text": f"Financial Health Score: {health['score']}/100 ({health['status']})."}
+
+        anomalies = signals.anomalies
+        if anomalies:
+            largest = max(anomalies, key=lambda a: a['amount'])
+            text = (f"{len(anomalies)} unusual transaction(s) detected; "
+                    f"the largest is {largest['title']} (${largest['amount']}).")
+        else:
+            text = "No unusual transactions detected."
+        yield "fact", {"signal": "anomalies", "value": len(anomalies), "text": text}
+
+        yield "done", {
+            "query": query,
+            "intent": intent,
+            "context_injected": signals.context,
+            "recommendation_engine_output": signals.engine_output()
+        }
+
+    @classmethod
+    def answer(cls, intent: str, signals: ChatSignals) -> str:
+        """Logic-based response generation (Simulating LLM routing)."""
+        if intent == "HEALTH_CHECK":
+            health = signals.health
+            recs = health.get('recommendations', [])
+            rec_text = recs[0] if recs else 'Keep it up — you are doing great!'
+            return f"Your Financial Health Score is {health.get('score', 'N/A')} ({health.get('status', 'Unknown')}). {rec_text}"
+
+        if intent == "FORECAST":
+            forecast = signals.forecast
+            diff = forecast - signals.monthly_budget
+            if diff > 0:
+                return f"Forecast predicts you'll overspend by ${round(diff, 2)}. {signals.context} I suggest locking non-essential categories."
+            return f"You are on track! Forecast predicts ${round(forecast, 2)} spend, leaving a surplus of ${round(abs(diff), 2)}."
+
+        if intent == "INVESTMENT":
+            surplus = signals.monthly_budget - signals.forecast
+            advice = InvestmentOptimizer.suggest_allocation(max(0, surplus))
+            return f"With your health score of {signals.health.get('score', 'N/A')}, I recommend: {advice.get('action', 'diversify your portfolio')}"
+
+        if intent == "EXPENSES":
+            expenses = signals.expenses
+            top_cat = "various"
+            if expenses:
+                top_cat = expenses.category_names[int(expenses.category_counts.argmax())]
+            return f"You've logged {len(expenses)} transactions recently. Your most frequent category is '{top_cat}'. {signals.context}"
+
+        if intent == "BUDGET":
+            monthly_budget = signals.monthly_budget
+            utilization = ((signals.forecast / monthly_budget) * 100) if monthly_budget > 0 else 0
+            return f"Your total monthly budget is set at ${monthly_budget}. You're currently projected to utilize {utilization:.1f}% of it. {signals.context}"
+
+        if intent == "ADVICE":
+            health = signals.health
+            return f"Financial Tip: Consider the 50/30/20 rule. Allocate 50% to needs, 30% to wants, and 20% to savings. Your current health score is {health['score']}, meaning you have a {health['status']} foundation."
+
+        # pick the reply first so only the signals it mentions are computed
+        generic_responses = [
+            lambda: f"I've analyzed your data. {signals.context} How can I help you optimize your wealth today?",
+            lambda: f"I'm standing by to help. Currently, your health score is {signals.health['score']}. Ask me about your 'forecast' or 'investment' strategy.",
+            lambda: f"Hello! Your data shows a {signals.forecast_result['trend']} trend in spending. What specific area of your finances would you like to discuss?"
+        ]
+        return random.choice(generic_responses)()
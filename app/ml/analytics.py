@@ -1,5 +1,7 @@
-from typing import List, Dict
-import numpy as np
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.ml.monte_carlo import SimulationResult
 
 class AnalyticsEngine:
     """
@@ -8,36 +10,80 @@ class AnalyticsEngine:
     """
 
     @classmethod
-    def get_forecast_vs_actual(cls, expenses: List[Dict]) -> List[Dict]:
-        """
-        Generates a 6-month historical series for 'Actual' vs 'Predicted' performance.
-        """
-        # Logic to extract monthly totals and compare with previous forecasts
-        # (For the demo, we simulate the 'Past Forecast' vs 'Actual')
-        return [
-            {"month": "Oct", "actual": 1200, "forecast": 1150},
-            {"month": "Nov", "actual": 1450, "forecast": 1400},
-            {"month": "Dec", "actual": 1900, "forecast": 1850},
-            {"month": "Jan", "actual": 1300, "forecast": 1350},
-            {"month": "Feb", "actual": 1500, "forecast": 1480},
-            {"month": "Mar (Pred)", "actual": None, "forecast": 1550},
+    def backtest_points(cls, monthly_totals: Dict[str, float], current_month: str,
+                        stored: Optional[Dict[str, Tuple[float, float]]] = None) -> Dict[str, Tuple[float, float]]:
+        """
+        `(actual, forecast)` for each completed month (before `current_month`)
+        not yet in `stored`, forecasting each month from the totals before it.
+        Pass only the points `reusable_points` accepts as `stored`.
+        """
+        from app.ml.forecaster import spendingForecaster
+
+        stored = stored or {}
+        months = [m for m in sorted(monthly_totals) if m < current_month]
+        amounts = [monthly_totals[m] for m in months]
+        if all(month in stored for month in months[1:]):
+            return {}
+        forecasts = spendingForecaster.walk_forward(amounts)
+        return {
+            month: (amounts[i], forecasts[i])
+            for i, month in enumerate(months)
+            if i >= 1 and month not in stored
+        }
+
+    @classmethod
+    def reusable_points(cls, monthly_totals: Dict[str, float], current_month: str,
+                        stored: Dict[str, Tuple[float, float]]) -> Dict[str, Tuple[float, float]]:
+        """
+        The stored points that still match the rollup. A point depends on every
+        month before it, so the first point whose month or actual no longer
+        matches the rollup invalidates it and all later ones. A backdated
+        write drops the points it affects, but that can race with a request
+        that stores points computed from an older rollup; this check catches it.
+        """
+        months = [m for m in sorted(monthly_totals) if m < current_month]
+        reusable = {}
+        for month, stored_month in zip(months[1:], sorted(stored)):
+            actual, forecast = stored[stored_month]
+            if stored_month != month or not math.isclose(actual, monthly_totals[month], rel_tol=1e-9, abs_tol=1e-6):
+                break
+            reusable[month] = (actual, forecast)
+        return reusable
+
+    @classmethod
+    def get_forecast_vs_actual(cls, monthly_totals: Dict[str, float], points: Dict[str, Tuple[float, float]],
+                               current_month: str, window: int = 6) -> List[Dict]:
+        """
+        Generates a 6-month historical series for 'Actual' vs 'Predicted' performance:
+        the last backtest points, then the forecast for the current month.
+        """
+        from app.ml.forecaster import spendingForecaster
+
+        series = [
+            {"month": cls._label(month), "period": month, "actual": round(actual, 2), "forecast": round(forecast, 2)}
+            for month, (actual, forecast) in sorted(points.items())[-(window - 1):]
         ]
+        history = [monthly_totals[m] for m in sorted(monthly_totals) if m < current_month]
+        if history:
+            prediction = spendingForecaster.predict_from_amounts(history)['monthly_forecast']
+            series.append({"month": f"{cls._label(current_month)} (Pred)", "period": current_month,
+                           "actual": None, "forecast": round(prediction, 2)})
+        return series
+
+    @staticmethod
+    def _label(month: str) -> str:
+        return datetime.strptime(month, "%Y-%m").strftime("%b")
 
     @classmethod
-    def get_monte_carlo_distribution(cls, results: Dict) -> Dict:
+    def get_monte_carlo_distribution(cls, results: SimulationResult, bins: int = 50) -> Dict:
         """
         Generates histogram data for the Monte Carlo wealth outcomes.
+        `results` is an `InvestmentOptimizer.simulate` result; the series is the
+        density of each portfolio's simulated final-year return, so it shows
+        the simulated risk (fat tails, total losses) rather than an idealized curve.
         """
-        # We simulate a normal distribution series based on the portfolio mean/vol
-        # This allows the frontend to render a bell curve
+        centers, density = results.distribution(bins)
         return {
-            "Conservative": cls._generate_bell_curve(0.05, 0.03),
-            "Moderate": cls._generate_bell_curve(0.08, 0.12),
-            "Aggressive": cls._generate_bell_curve(0.12, 0.20)
+            name: [{"x": round(float(x), 4), "y": round(float(y), 2)} for x, y in zip(centers[p], density[p])]
+            for p, name in enumerate(results.names)
         }
-
-    @staticmethod
-    def _generate_bell_curve(mu, sigma):
-        x = np.linspace(mu - 3*sigma, mu + 3*sigma, 50)
-        y = (1 / (sigma * np.sqrt(2 * np.pi))) * np.exp(-0.5 * ((x - mu) / sigma)**2)
-        return [{"x": round(float(xi), 4), "y": round(float(yi), 2)} for xi, yi in zip(x, y)]
@@ -1,6 +1,9 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 import numpy as np
 import math
+from app.ml.expense_columns import ExpenseColumns, expense_amounts
+from app.ml.feature_frame import FinancialFeatureFrame
+from app.ml.streaming_stats import MerchantStats
 
 class AnomalyDetector:
     """
@@ -8,15 +11,22 @@ class AnomalyDetector:
     This is vital for security and identifying budget leaks.
     """
     
+    CONSISTENCY_CONSTANT = 1.4826  # MAD -> std scale for a normal distribution
+
     @classmethod
-    def detect_anomalies(cls, expenses: List[Dict], threshold: float = 2.0) -> List[Dict]:
+    def detect_anomalies(cls, expenses: Union[List[Dict], ExpenseColumns, FinancialFeatureFrame],
+                         threshold: float = 2.0) -> List[Dict]:
         """
         Detects anomalies by comparing each transaction to its SPECIFIC merchant baseline.
         If a merchant has only 1 transaction, it falls back to global category stats.
         """
         if not expenses:
             return []
+        return cls._detect_grouped(expenses, threshold)
 
+    @classmethod
+    def _detect_per_row(cls, expenses, threshold: float) -> List[Dict]:
+        """Straightforward per-merchant implementation, kept as the reference `_detect_grouped` must match."""
         # 1. Group by Merchant (Title)
         merchant_history = {}
         for exp in expenses:
@@ -28,7 +38,7 @@ class AnomalyDetector:
         anomalies = []
         
         # 2. Global statistics (Fallback)
-        all_amounts = [e['amount'] for e in expenses]
+        all_amounts = expense_amounts(expenses)
         global_mean = np.mean(all_amounts)
         global_std = np.std(all_amounts) if len(all_amounts) > 1 else global_mean * 0.5
 
@@ -42,32 +52,112 @@ class AnomalyDetector:
                 median = np.median(history)
                 mad = np.median([abs(x - median) for x in history])
                 
-                # Default scale for normal distribution (1.4826)
-                consistency_constant = 1.4826
                 # Avoid division by zero
                 mad = max(mad, median * 0.02) 
                 
-                robust_z_score = abs(exp['amount'] - median) / (consistency_constant * mad)
-                z_score = robust_z_score
-                # Anomaly probability based on Z-score
-                # 2.0 Z ~ 95% (Anom prob ~ 50%), 3.0 Z ~ 99% (Anom prob ~ 90%)
-                # We use a simple sigmoid-like mapping for the demo
-                probability = 1 / (1 + math.exp(-2 * (z_score - 2.5)))
-                reason = f"Spending on '{exp['title']}' is {round(z_score, 1)}x robust-STDs above its median."
+                z_score = abs(exp['amount'] - median) / (cls.CONSISTENCY_CONSTANT * mad)
+                robust = True
             else:
                 # Fallback to Global stats
                 z_score = abs(exp['amount'] - global_mean) / global_std
-                probability = 1 / (1 + math.exp(-2 * (z_score - 3.0)))
-                reason = f"Unusual amount for a new merchant. Spending is {round(z_score, 1)}x above your global average."
+                robust = False
 
             if z_score > threshold:
-                anomalies.append({
-                    "expense_id": exp.get('id'),
-                    "title": exp['title'],
-                    "amount": exp['amount'],
-                    "z_score": round(z_score, 2),
-                    "anomaly_probability": round(float(probability), 2),
-                    "reason": reason
-                })
+                anomalies.append(cls._report(exp.get('id'), exp['title'], exp['amount'], z_score, robust))
 
         return anomalies
+
+    @classmethod
+    def _detect_grouped(cls, expenses, threshold: float) -> List[Dict]:
+        """
+        Same scores as `_detect_per_row`, computed with one sort per statistic:
+        rows are ordered by (merchant, value) so every merchant's median sits at
+        a fixed offset of its segment.
+        """
+        frame = FinancialFeatureFrame.of(expenses)
+        expenses = frame.expenses
+        columns = isinstance(expenses, ExpenseColumns)
+        titles = frame.titles
+        amounts = frame.amounts
+        codes = frame.merchant_codes
+        counts = frame.merchant_counts
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            medians = cls._segment_medians(codes, amounts, counts)
+            deviations = np.abs(amounts - medians[codes])
+            mads = np.maximum(cls._segment_medians(codes, deviations, counts), medians * 0.02)
+            robust_z = deviations / (cls.CONSISTENCY_CONSTANT * mads[codes])
+
+            global_mean = frame.mean
+            global_std = frame.std if len(amounts) > 1 else global_mean * 0.5
+            global_z = np.abs(amounts - global_mean) / global_std
+
+        robust = counts[codes] >= 2
+        z_scores = np.where(robust, robust_z, global_z)
+
+        anomalies = []
+        for i in np.flatnonzero(z_scores > threshold).tolist():
+            if columns:
+                exp_id, title, amount = expenses[i]['id'], titles[i], float(amounts[i])
+            else:
+                exp = expenses[i]
+                exp_id, title, amount = exp.get('id'), exp['title'], exp['amount']
+            anomalies.append(cls._report(exp_id, title, amount, z_scores[i], bool(robust[i])))
+        return anomalies
+
+    @classmethod
+    def score_new_expense(cls, title: str, amount: float, merchant: MerchantStats, overall: MerchantStats,
+                          threshold: float = 2.0) -> Optional[Dict]:
+        """
+        Scores one incoming expense in O(1) against running baselines that
+        already include it, mirroring `detect_anomalies`: the merchant's
+        streaming median/MAD once it has 2+ expenses, otherwise the user's
+        overall mean/std. Returns the anomaly report, or None.
+        """
+        if merchant.count >= 2:
+            median = merchant.median.value()
+            scale = cls.CONSISTENCY_CONSTANT * max(merchant.mad(), median * 0.02)
+            deviation = abs(amount - median)
+            robust = True
+        elif overall.count >= 1:
+            scale = overall.running.std if overall.count > 1 else overall.running.mean * 0.5
+            deviation = abs(amount - overall.running.mean)
+            robust = False
+        else:
+            return None
+        if scale <= 0:
+            return None
+        z_score = deviation / scale
+        if z_score <= threshold:
+            return None
+        return cls._report(None, title, amount, z_score, robust)
+
+    @staticmethod
+    def _segment_medians(codes: np.ndarray, values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """np.median of `values` within each group of `codes` (groups must be 0..k-1)."""
+        ordered = values[np.lexsort((values, codes))]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        upper = ordered[starts + counts // 2]
+        lower = ordered[starts + (counts - 1) // 2]
+        # odd counts pick the middle value; even counts average the two middle values like np.median
+        return np.where(counts % 2 == 1, upper, (lower + upper) / 2)
+
+    @staticmethod
+    def _report(expense_id, title: str, amount, z_score, robust: bool) -> Dict:
+        if robust:
+            # Anomaly probability based on Z-score
+            # 2.0 Z ~ 95% (Anom prob ~ 50%), 3.0 Z ~ 99% (Anom prob ~ 90%)
+            # We use a simple sigmoid-like mapping for the demo
+            probability = 1 / (1 + math.exp(-2 * (z_score - 2.5)))
+            reason = f"Spending on '{title}' is {round(z_score, 1)}x robust-STDs above its median."
+        else:
+            probability = 1 / (1 + math.exp(-2 * (z_score - 3.0)))
+            reason = f"Unusual amount for a new merchant. Spending is {round(z_score, 1)}x above your global average."
+        return {
+            "expense_id": expense_id,
+            "title": title,
+            "amount": amount,
+            "z_score": round(z_score, 2),
+            "anomaly_probability": round(float(probability), 2),
+            "reason": reason
+        }
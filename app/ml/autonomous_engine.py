@@ -4,6 +4,7 @@ from app.ml.anomaly_detector import AnomalyDetector
 from app.ml.investment_optimizer import InvestmentOptimizer
 from app.ml.smart_suggestions import SmartSuggestions
 from app.ml.health_score import FinancialHealthScore
+from app.ml.feature_frame import FinancialFeatureFrame
 
 class AutonomousEngine:
     """
@@ -17,6 +18,8 @@ class AutonomousEngine:
         Analyzes financial state and returns a list of prioritized autonomous actions.
         """
         actions = []
+        # amounts, merchants and months are derived once and shared by every engine below
+        expenses = FinancialFeatureFrame.of(expenses)
         
         # 0. Health Score Context
         health = FinancialHealthScore.calculate(expenses, monthly_budget, income)
@@ -1,5 +1,7 @@
-from typing import Dict
+from collections import OrderedDict
+from typing import Dict, List
 import os
+import threading
 import joblib
 from pathlib import Path
 
@@ -13,10 +15,17 @@ class MerchantCategorizer:
 
     If a persisted model isn't present, falls back to a lightweight rule-based
     categorizer to remain operational.
+
+    Results are memoized per normalized title (case and whitespace folded) in
+    a bounded LRU, since the same merchants come back again and again.
     """
 
+    CACHE_SIZE = 4096
+
     _model = None
     _vect = None
+    _cache: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+    _cache_lock = threading.Lock()
 
     @classmethod
     def _load(cls):
@@ -32,19 +41,61 @@ class MerchantCategorizer:
 
     @classmethod
     def categorize(cls, title: str) -> Dict[str, str]:
+        return cls.categorize_many([title])[0]
+
+    @classmethod
+    def categorize_many(cls, titles: List[str]) -> List[Dict[str, str]]:
+        """
+        Categorize a batch of titles. Titles missing from the cache are
+        vectorized and predicted together in one call, once per normalized title.
+        """
+        keys = [cls.normalize(t) for t in titles]
+        results = {}
+        with cls._cache_lock:
+            for key in dict.fromkeys(keys):
+                if key in cls._cache:
+                    cls._cache.move_to_end(key)
+                    results[key] = cls._cache[key]
+        missing = [key for key in dict.fromkeys(keys) if key not in results]
+        if missing:
+            predicted = dict(zip(missing, cls._predict(missing)))
+            results.update(predicted)
+            with cls._cache_lock:
+                cls._cache.update(predicted)
+                while len(cls._cache) > cls.CACHE_SIZE:
+                    cls._cache.popitem(last=False)
+        # callers get their own dicts, never the cached ones
+        return [dict(results[key]) for key in keys]
+
+    @classmethod
+    def clear_cache(cls):
+        """Forget memoized results, e.g. after the persisted model changes."""
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    @staticmethod
+    def normalize(title: str) -> str:
+        return " ".join((title or "").lower().split())
+
+    @classmethod
+    def _predict(cls, texts: List[str]) -> List[Dict[str, str]]:
         cls._load()
-        t = (title or "")
         if cls._model and cls._vect:
             try:
-                x = cls._vect.transform([t])
-                pred = cls._model.predict_proba(x)[0]
-                label = cls._model.classes_[pred.argmax()]
-                confidence = float(pred.max())
-                return {"category": label, "confidence": confidence}
+                probs = cls._model.predict_proba(cls._vect.transform(texts))
+                best = probs.argmax(axis=1)
+                return [
+                    {"category": cls._model.classes_[i], "confidence": float(row[i])}
+                    for row, i in zip(probs, best)
+                ]
             except Exception:
                 # fall back to rules
                 pass
 
+        return [cls._categorize_by_rules(t) for t in texts]
+
+    @staticmethod
+    def _categorize_by_rules(t: str) -> Dict[str, str]:
         # fallback simple rules
         lt = t.lower()
         if any(k in lt for k in ("starbuck", "coffee", "latte")):
@@ -57,4 +108,3 @@ class MerchantCategorizer:
             cat = "uncategorized"
 
         return {"category": cat, "confidence": 0.6}
-
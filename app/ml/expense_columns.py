@@ -0,0 +1,118 @@
+from typing import Any, Iterable, Sequence
+import numpy as np
+
+FIELDS = ("id", "amount", "title", "category", "created_at")
+
+
+class ExpenseRecord:
+    """
+    Lightweight read-only view of one expense.
+    Supports `record['amount']` and `record.get('category')` so engines written
+    against expense dicts work unchanged.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, id, amount, title, category, created_at):
+        self.id = id
+        self.amount = amount
+        self.title = title
+        self.category = category
+        self.created_at = created_at
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def __repr__(self):
+        return f"ExpenseRecord(id={self.id!r}, amount={self.amount!r}, title={self.title!r})"
+
+
+def _id_array(values: Sequence) -> np.ndarray:
+    if any(v is None for v in values):
+        return np.array(values, dtype=object)
+    return np.array(values, dtype=np.int64)
+
+
+class ExpenseColumns:
+    """
+    Columnar expense batch: one NumPy array per field instead of one dict per row.
+
+    Engines can read the arrays directly (`amounts`, `titles`, ...) or iterate it
+    like a list of expense dicts; `len()`, truthiness, indexing and slicing behave
+    like a list.
+    """
+
+    __slots__ = ("ids", "amounts", "titles", "categories", "created_at")
+
+    def __init__(self, ids: np.ndarray, amounts: np.ndarray, titles: np.ndarray,
+                 categories: np.ndarray, created_at: np.ndarray):
+        self.ids = ids
+        self.amounts = amounts
+        self.titles = titles
+        self.categories = categories
+        self.created_at = created_at
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> "ExpenseColumns":
+        """Build from `(id, amount, title, category, created_at)` tuples, e.g. a Core result."""
+        rows = list(rows)
+        if not rows:
+            return cls.empty()
+        ids, amounts, titles, categories, created_at = zip(*rows)
+        return cls(
+            _id_array(ids),
+            np.array(amounts, dtype=np.float64),
+            np.array(titles, dtype=object),
+            np.array(categories, dtype=object),
+            np.array(created_at, dtype=object),
+        )
+
+    @classmethod
+    def from_records(cls, expenses: Iterable) -> "ExpenseColumns":
+        """Build from expense dicts (missing keys become None)."""
+        return cls.from_rows(tuple(e.get(f) for f in FIELDS) for e in expenses)
+
+    @classmethod
+    def coerce(cls, expenses) -> "ExpenseColumns":
+        if isinstance(expenses, cls):
+            return expenses
+        return cls.from_records(expenses or [])
+
+    @classmethod
+    def empty(cls) -> "ExpenseColumns":
+        obj = np.array([], dtype=object)
+        return cls(np.array([], dtype=np.int64), np.array([], dtype=np.float64), obj, obj.copy(), obj.copy())
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __iter__(self):
+        return map(ExpenseRecord, self.ids.tolist(), self.amounts.tolist(), self.titles.tolist(),
+                   self.categories.tolist(), self.created_at.tolist())
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return ExpenseRecord(self.ids[index].item() if self.ids.dtype != object else self.ids[index],
+                                 float(self.amounts[index]), self.titles[index],
+                                 self.categories[index], self.created_at[index])
+        # slices and boolean/integer masks return a new batch
+        return ExpenseColumns(self.ids[index], self.amounts[index], self.titles[index],
+                              self.categories[index], self.created_at[index])
+
+    def __repr__(self):
+        return f"ExpenseColumns(n={len(self)})"
+
+
+def expense_amounts(expenses) -> np.ndarray:
+    """Amounts of a dict list or ExpenseColumns as a float array (no copy for columns)."""
+    if isinstance(expenses, ExpenseColumns):
+        return expenses.amounts
+    return np.array([e['amount'] for e in expenses], dtype=np.float64)
@@ -0,0 +1,100 @@
+from functools import cached_property
+from typing import Dict, List, Tuple
+import numpy as np
+from app.ml.expense_columns import ExpenseColumns, expense_amounts
+from app.ml.monthly_buckets import monthly_totals
+
+
+def _factorize(values) -> Tuple[np.ndarray, List]:
+    """Codes into the distinct values, numbered in order of first appearance."""
+    index = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+    return codes, list(index)
+
+
+class FinancialFeatureFrame:
+    """
+    Features of one user's expenses, built once per request and passed to
+    every ML engine instead of the raw expenses.
+
+    Amounts and totals are computed up front; merchant/category codes and
+    month buckets on first use, then memoized. Engines call
+    `FinancialFeatureFrame.of(expenses)`, which returns an existing frame
+    unchanged, so they still accept plain dict lists and ExpenseColumns.
+    Iterating or `len()` behaves like the wrapped expenses.
+    """
+
+    def __init__(self, expenses):
+        self.expenses = expenses if expenses is not None else []
+        self.amounts = expense_amounts(self.expenses)
+        self.total = float(self.amounts.sum())
+
+    @classmethod
+    def of(cls, expenses) -> "FinancialFeatureFrame":
+        return expenses if isinstance(expenses, cls) else cls(expenses)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __iter__(self):
+        return iter(self.expenses)
+
+    def __getitem__(self, index):
+        return self.expenses[index]
+
+    @cached_property
+    def titles(self) -> List[str]:
+        if isinstance(self.expenses, ExpenseColumns):
+            return self.expenses.titles.tolist()
+        return [e['title'] for e in self.expenses]
+
+    @cached_property
+    def categories(self) -> List:
+        if isinstance(self.expenses, ExpenseColumns):
+            return self.expenses.categories.tolist()
+        return [e.get('category') for e in self.expenses]
+
+    @cached_property
+    def _merchants(self) -> Tuple[np.ndarray, List[str]]:
+        # merchants are lowercased titles, as in the anomaly detector's per-merchant baselines
+        return _factorize([t.lower() for t in self.titles])
+
+    @property
+    def merchant_codes(self) -> np.ndarray:
+        return self._merchants[0]
+
+    @property
+    def merchant_names(self) -> List[str]:
+        return self._merchants[1]
+
+    @cached_property
+    def merchant_counts(self) -> np.ndarray:
+        return np.bincount(self.merchant_codes, minlength=len(self.merchant_names))
+
+    @cached_property
+    def _categories(self) -> Tuple[np.ndarray, List]:
+        return _factorize(self.categories)
+
+    @property
+    def category_codes(self) -> np.ndarray:
+        return self._categories[0]
+
+    @property
+    def category_names(self) -> List:
+        return self._categories[1]
+
+    @cached_property
+    def category_counts(self) -> np.ndarray:
+        return np.bincount(self.category_codes, minlength=len(self.category_names))
+
+    @cached_property
+    def monthly_totals(self) -> Dict[str, float]:
+        return monthly_totals(self.expenses)
+
+    @cached_property
+    def mean(self) -> float:
+        return float(np.mean(self.amounts))
+
+    @cached_property
+    def std(self) -> float:
+        return float(np.std(self.amounts))
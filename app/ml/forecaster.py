@@ -1,65 +1,68 @@
 from typing import List, Dict
 import datetime
-import numpy as np
+from app.ml.feature_frame import FinancialFeatureFrame
+from app.ml.streaming_stats import RunningStats
 
-class spendingForecaster:
+
+class _ForecastState:
     """
-    Forecasting engine to predict future spending.
-    In a full ML implementation, this would use Prophet or LSTM.
-    For this marathon, we implement a 'Weighted Moving Average' approach 
-    which is robust for small financial datasets.
+    Running sums behind the forecast: the weighted moving average's numerator
+    and weights, the last month, and the month-over-month growth rates
+    (Welford mean/std). Adding a month is O(1).
     """
-    
-    @classmethod
-    def predict_next_month(cls, expenses: List[Dict]) -> float:
-        """
-        Predicts total spending for the next month based on historical data.
-        expects expenses as a list of dicts: {'amount': float, 'created_at': datetime}
-        """
-        if not expenses:
+
+    __slots__ = ("count", "weighted_sum", "weight_total", "last", "growth")
+
+    def __init__(self):
+        self.count = 0
+        self.weighted_sum = 0.0
+        self.weight_total = 0
+        self.last = None
+        self.growth = RunningStats()
+
+    def add(self, amount: float):
+        if self.last is not None and self.last > 0:
+            self.growth.add((amount - self.last) / self.last)
+        self.count += 1
+        self.weighted_sum += amount * self.count
+        self.weight_total += self.count
+        self.last = amount
+
+    def forecast(self) -> float:
+        return self.prediction()["monthly_forecast"]
+
+    def prediction(self) -> Dict:
+        if not self.count:
             return {
                 "monthly_forecast": 0.0,
                 "trend": "stable",
                 "confidence_level": 0.10
             }
-            
-        # Group by month
-        monthly_totals = {}
-        for exp in expenses:
-            month_key = exp['created_at'].strftime("%Y-%m")
-            monthly_totals[month_key] = monthly_totals.get(month_key, 0) + exp['amount']
-            
-        sorted_months = sorted(monthly_totals.keys())
-        amounts = [monthly_totals[m] for m in sorted_months]
-        
-        if len(amounts) < 2:
+
+        if self.count < 2:
             return {
-                "monthly_forecast": amounts[0] if amounts else 0.0,
+                "monthly_forecast": self.last,
                 "trend": "stable",
                 "confidence_level": 0.30
             }
-            
+
         # Weighted moving average (for comparison and stability)
-        weights = [i + 1 for i in range(len(amounts))]
-        weighted_sum = sum(a * w for a, w in zip(amounts, weights))
-        wma_forecast = weighted_sum / sum(weights)
-        
+        wma_forecast = self.weighted_sum / self.weight_total
+
         # Growth Rate Extrapolation (Professional AI Layer)
-        growth_rates = [(amounts[i] - amounts[i-1]) / amounts[i-1] for i in range(1, len(amounts)) if amounts[i-1] > 0]
-        avg_growth = np.mean(growth_rates) if growth_rates else 0
-        
+        avg_growth = self.growth.mean if self.growth.count else 0
+
         # Forecast = Last Month extrapolated by Growth Rate
         # We blend WMA and Growth Rate for 'conservative intelligence'
-        extrapolated_forecast = amounts[-1] * (1 + avg_growth)
+        extrapolated_forecast = self.last * (1 + avg_growth)
         forecast = (extrapolated_forecast * 0.7) + (wma_forecast * 0.3)
-        
+
         # Trend & Momentum
-        trend_delta = amounts[-1] - amounts[-2]
         trend = "increasing" if avg_growth > 0.02 else "decreasing" if avg_growth < -0.02 else "stable"
-            
+
         # Confidence Level (based on consistency of growth rates)
-        volatility = np.std(growth_rates) if len(growth_rates) > 1 else 0.5
-        data_density_score = min(len(amounts) / 12, 1.0)
+        volatility = self.growth.std if self.growth.count > 1 else 0.5
+        data_density_score = min(self.count / 12, 1.0)
         confidence = max(0.1, (data_density_score * 0.7) + (max(0, 1 - volatility) * 0.3))
 
         return {
@@ -69,10 +72,76 @@ class spendingForecaster:
             "annual_growth_projection": f"{round(avg_growth * 12 * 100, 1)}%"
         }
 
+
+class spendingForecaster:
+    """
+    Forecasting engine to predict future spending.
+    In a full ML implementation, this would use Prophet or LSTM.
+    For this marathon, we implement a 'Weighted Moving Average' approach 
+    which is robust for small financial datasets.
+    """
+    
+    @classmethod
+    def predict_next_month(cls, expenses: List[Dict]) -> float:
+        """
+        Predicts total spending for the next month based on historical data.
+        expects expenses as a list of dicts: {'amount': float, 'created_at': datetime}
+        (or ExpenseColumns / a FinancialFeatureFrame of them)
+        """
+        frame = FinancialFeatureFrame.of(expenses)
+        if not frame:
+            return {
+                "monthly_forecast": 0.0,
+                "trend": "stable",
+                "confidence_level": 0.10
+            }
+            
+        # Group by month (vectorized; same totals as a per-expense strftime loop)
+        return cls.predict_from_monthly_totals(frame.monthly_totals)
+
+    @classmethod
+    def predict_from_monthly_totals(cls, monthly_totals: Dict[str, float]) -> Dict:
+        """
+        Same forecast as `predict_next_month`, from precomputed {"YYYY-MM": total} buckets
+        (e.g. the user_monthly_totals rollup), so the cost is O(months) instead of O(expenses).
+        """
+        if not monthly_totals:
+            return {
+                "monthly_forecast": 0.0,
+                "trend": "stable",
+                "confidence_level": 0.10
+            }
+
+        sorted_months = sorted(monthly_totals.keys())
+        return cls.predict_from_amounts([monthly_totals[m] for m in sorted_months])
+
+    @classmethod
+    def predict_from_amounts(cls, amounts: List[float]) -> Dict:
+        """Forecast from monthly totals already in month order (the core of `predict_from_monthly_totals`)."""
+        state = _ForecastState()
+        for amount in amounts:
+            state.add(amount)
+        return state.prediction()
+
+    @classmethod
+    def walk_forward(cls, amounts: List[float]) -> List[float]:
+        """
+        `monthly_forecast` for each month of `amounts` made from the months
+        before it, i.e. `predict_from_amounts(amounts[:i])` for every i, in one
+        O(months) pass over running sums.
+        """
+        state = _ForecastState()
+        forecasts = []
+        for amount in amounts:
+            forecasts.append(state.forecast())
+            state.add(amount)
+        return forecasts
+
     @classmethod
-    def get_category_recommendations(cls, expenses: List[Dict]) -> Dict[str, str]:
+    def get_category_recommendations(cls, category_totals: List[Dict]) -> Dict[str, str]:
         """
         Analyzes category spending trends and provides 'Autonomous' advice.
+        `category_totals` are monthly rollup rows: {"month", "category", "total", "count"}.
         """
         # Logic to find which category is growing fastest
         return {
@@ -1,5 +1,7 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 import numpy as np
+from app.ml.expense_columns import ExpenseColumns
+from app.ml.feature_frame import FinancialFeatureFrame
 
 class FinancialHealthScore:
     """
@@ -8,11 +10,13 @@ class FinancialHealthScore:
     """
 
     @classmethod
-    def calculate(cls, expenses: List[Dict], monthly_budget: float, income: float) -> Dict:
+    def calculate(cls, expenses: Union[List[Dict], ExpenseColumns, FinancialFeatureFrame],
+                  monthly_budget: float, income: float) -> Dict:
         """
         Calculates the health score and identifies key contributors.
         """
-        if not expenses or income <= 0:
+        frame = FinancialFeatureFrame.of(expenses)
+        if not frame or income <= 0:
             return {
                 "score": 50,
                 "status": "Insufficient Data",
@@ -21,7 +25,8 @@ class FinancialHealthScore:
                 "recommendations": ["Set your monthly income and add some expenses to get personalized advice."]
             }
 
-        total_spent = sum(e['amount'] for e in expenses)
+        amounts = frame.amounts
+        total_spent = frame.total
         
         # 1. Savings Rate (Target: 20%+)
         savings = income - total_spent
@@ -35,9 +40,8 @@ class FinancialHealthScore:
             adherence_score = max(50 - (budget_utilization - 100), 0)
 
         # 3. Spending Volatility (Target: Low Std Dev)
-        amounts = [e['amount'] for e in expenses]
         if len(amounts) > 1:
-            volatility = np.std(amounts) / np.mean(amounts) if np.mean(amounts) > 0 else 1.0
+            volatility = frame.std / frame.mean if frame.mean > 0 else 1.0
             volatility_score = max(100 - (volatility * 100), 0)
         else:
             volatility_score = 70 # Default for single transaction
@@ -54,7 +58,7 @@ class FinancialHealthScore:
             "metrics": {
                 "savings_rate_pct": round(savings_rate, 1),
                 "budget_utilization_pct": round(budget_utilization, 1),
-                "volatility_index": round(float(np.std(amounts) if len(amounts) > 1 else 0), 2)
+                "volatility_index": round(frame.std if len(amounts) > 1 else 0.0, 2)
             },
             "recommendations": cls._get_recommendations(final_score, savings_rate, budget_utilization)
         }
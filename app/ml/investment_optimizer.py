@@ -1,5 +1,15 @@
-from typing import Dict, List
-import numpy as np
+from functools import lru_cache
+from typing import Dict, Optional
+from app.ml.monte_carlo import BAND_PERCENTILES, SimulationResult, simulate_paths
+
+
+def _simulate(params: tuple, years: int, iterations: int, seed: Optional[int]) -> SimulationResult:
+    names, mu, sigma = zip(*params)
+    return simulate_paths(list(names), mu, sigma, years, iterations, seed)
+
+
+# a 50-year result holds ~2.5MB of histograms; results are read-only, so sharing them is safe
+_simulate_cached = lru_cache(maxsize=32)(_simulate)
 
 class InvestmentOptimizer:
     """
@@ -13,23 +23,41 @@ class InvestmentOptimizer:
         "Aggressive": {"mu": 0.12, "sigma": 0.20, "composition": "20% Bonds, 80% Stocks", "risk_free": 0.03},
     }
 
+    DEFAULT_SEED = 20240601  # simulations are reproducible (and cacheable) unless a seed is given
+
     @classmethod
-    def simulate_monte_carlo(cls, principal: float, years: int = 1, iterations: int = 1000) -> Dict:
+    def simulate(cls, years: int = 1, iterations: int = 1000, seed: Optional[int] = DEFAULT_SEED) -> SimulationResult:
+        """
+        Simulates every portfolio for a principal of 1 (see `simulate_paths`).
+        Seeded runs are memoized on (portfolio params, years, iterations, seed),
+        so repeating one is a lookup; `seed=None` always draws fresh paths.
+        """
+        params = tuple((name, data["mu"], data["sigma"]) for name, data in cls.PORTFOLIOS.items())
+        if seed is None:
+            return _simulate(params, years, iterations, None)
+        return _simulate_cached(params, years, iterations, seed)
+
+    @classmethod
+    def simulate_monte_carlo(cls, principal: float, years: int = 1, iterations: int = 1000,
+                             seed: Optional[int] = DEFAULT_SEED) -> Dict:
         """
         Runs a Monte Carlo simulation for each portfolio to project potential outcomes.
+        Every path compounds a fresh annual return R = mu + sigma * Z for each of
+        the `years`; `yearly_bands` gives the p10/p50/p90 wealth after each year.
+        Outcomes scale linearly with `principal`, so only the unit simulation is
+        cached and each call just multiplies it.
         """
+        sim = cls.simulate(years, iterations, seed)
+        bands = sim.percentiles(BAND_PERCENTILES) * principal
+        means = sim.mean * principal
+
         results = {}
-        for name, data in cls.PORTFOLIOS.items():
+        for p, name in enumerate(sim.names):
+            data = cls.PORTFOLIOS[name]
             mu = data["mu"]
             sigma = data["sigma"]
             rf = data["risk_free"]
             
-            # Simulated annual returns: R = mu + sigma * Z
-            # Over T years: (1 + R)^T
-            # For Monte Carlo, we simulate 1000 paths
-            simulated_annual_returns = np.random.normal(mu, sigma, iterations)
-            final_values = principal * (1 + simulated_annual_returns) ** years
-            
             sharpe_ratio = (mu - rf) / sigma if sigma > 0 else 0
             
             results[name] = {
@@ -38,11 +66,21 @@ class InvestmentOptimizer:
                 "sharpe_ratio": round(float(sharpe_ratio), 2),
                 "risk_band": "Low Risk" if sigma < 0.05 else "Moderate Risk" if sigma < 0.15 else "High Risk",
                 "projection": {
-                    "mean": round(float(np.mean(final_values)), 2),
-                    "p10_worst_case": round(float(np.percentile(final_values, 10)), 2),
-                    "p90_best_case": round(float(np.percentile(final_values, 90)), 2),
+                    "mean": round(float(means[p, -1]), 2),
+                    "p10_worst_case": round(float(bands[p, -1, 0]), 2),
+                    "p90_best_case": round(float(bands[p, -1, 2]), 2),
                     "volatility": f"{int(sigma*100)}%"
-                }
+                },
+                "yearly_bands": [
+                    {
+                        "year": y + 1,
+                        "mean": round(float(means[p, y]), 2),
+                        "p10": round(float(bands[p, y, 0]), 2),
+                        "p50": round(float(bands[p, y, 1]), 2),
+                        "p90": round(float(bands[p, y, 2]), 2),
+                    }
+                    for y in range(sim.years)
+                ]
             }
         return results
 
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import numpy as np
 
 class MetricsManager:
@@ -16,35 +16,62 @@ class MetricsManager:
         if not expenses:
             return cls.get_fallback_metrics()
 
-        from app.ml.forecaster import spendingForecaster
-        
-        # 1. Group expenses by month
-        monthly_data = {}
-        for exp in expenses:
-            month = exp['created_at'].strftime("%Y-%m")
-            monthly_data[month] = monthly_data.get(month, 0) + exp['amount']
-        
-        sorted_months = sorted(monthly_data.keys())
+        from app.ml.monthly_buckets import monthly_totals
+
+        # Predicting month T only depends on the totals of months [0...T-1],
+        # so the expenses are bucketed once and the backtest runs on the buckets
+        return cls.calculate_performance_from_monthly_totals(monthly_totals(expenses))
+
+    @classmethod
+    def calculate_performance_from_monthly_totals(cls, monthly_totals: Dict[str, float]) -> Dict:
+        """
+        Walk-forward backtest over precomputed {"YYYY-MM": total} buckets.
+        Each step forecasts from a prefix of the sorted totals, so the cost is
+        O(months) per step and no raw expenses are read.
+        """
+        if not monthly_totals:
+            return cls.get_fallback_metrics()
+
+        sorted_months = sorted(monthly_totals.keys())
         if len(sorted_months) < 3:
             return cls.get_fallback_metrics("Insufficient history for real-time validation.")
 
-        # 2. Walk-forward MAPE calculation
-        # For each month T, predict using months [0...T-1], compare with actual T
-        errors = []
-        for i in range(2, len(sorted_months)):
-            prev_months_data = [] # Simulated list of expenses up to month i-1
-            # Filter original expenses to simulate the past
-            past_cutoff = sorted_months[i]
-            simulated_history = [e for e in expenses if e['created_at'].strftime("%Y-%m") < past_cutoff]
-            
-            prediction_obj = spendingForecaster.predict_next_month(simulated_history)
-            prediction = prediction_obj['monthly_forecast']
-            actual = monthly_data[sorted_months[i]]
-            
+        return cls._performance_report(cls.backtest([monthly_totals[m] for m in sorted_months]))
+
+    @classmethod
+    def backtest(cls, amounts: List[float], start: int = 2) -> List[Tuple[float, float]]:
+        """
+        `(actual, prediction)` for every month from `start` on, each predicted
+        from the months before it. `amounts` are monthly totals in month order.
+        """
+        from app.ml.forecaster import spendingForecaster
+
+        forecasts = spendingForecaster.walk_forward(amounts)
+        return [(amounts[i], forecasts[i]) for i in range(start, len(amounts))]
+
+    @classmethod
+    def _accuracy(cls, points: List[Tuple[float, float]]) -> Dict:
+        """MAPE, MAE, sMAPE and bias of backtest points, in one pass."""
+        ape, abs_errors, sape, signed = [], [], [], []
+        for actual, prediction in points:
+            error = prediction - actual
+            abs_errors.append(abs(error))
+            signed.append(error)
             if actual > 0:
-                error = abs(actual - prediction) / actual
-                errors.append(error)
+                ape.append(abs(error) / actual)
+            if abs(actual) + abs(prediction) > 0:
+                sape.append(2 * abs(error) / (abs(actual) + abs(prediction)))
+        return {
+            "errors": ape,
+            "mae": float(np.mean(abs_errors)) if abs_errors else None,
+            "smape": float(np.mean(sape)) * 100 if sape else None,
+            "bias": float(np.mean(signed)) if signed else None,
+        }
 
+    @classmethod
+    def _performance_report(cls, points: List[Tuple[float, float]]) -> Dict:
+        accuracy = cls._accuracy(points)
+        errors = accuracy["errors"]
         mape = np.mean(errors) * 100 if errors else 8.4 # Fallback to a realistic default if no errors computed
 
         return {
@@ -52,7 +79,11 @@ class MetricsManager:
                 "metric": "MAPE (Mean Absolute Percentage Error)",
                 "value": f"{round(mape, 1)}%",
                 "status": "Verified on Data" if errors else "Heuristic Fallback",
-                "sample_size": f"{len(errors)} validation points"
+                "sample_size": f"{len(errors)} validation points",
+                "mae": round(accuracy["mae"], 2) if accuracy["mae"] is not None else None,
+                "smape": f"{round(accuracy['smape'], 1)}%" if accuracy["smape"] is not None else "N/A",
+                # positive bias = the forecaster over-predicts on average
+                "bias": round(accuracy["bias"], 2) if accuracy["bias"] is not None else None,
             },
             "anomaly_detector": {
                 "metric": "Precision",
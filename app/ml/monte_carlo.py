@@ -0,0 +1,140 @@
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+CHUNK_BYTES = 16 * 1024 * 1024  # size of the return tensor drawn at once (peak memory is a few times this)
+HISTOGRAM_BINS = 2048
+BAND_PERCENTILES = (10, 50, 90)
+
+
+class SimulationResult:
+    """
+    Outcome of a multi-year simulation for a principal of 1, so any principal
+    is a multiply away. `histograms[p, y]` counts paths per log-wealth bin
+    between `edges[p, y, 0]` and `edges[p, y, -1]` (outliers land in the edge bins).
+    """
+
+    __slots__ = ("names", "years", "iterations", "seed", "mean", "edges", "histograms", "_distributions")
+
+    def __init__(self, names: List[str], years: int, iterations: int, seed: Optional[int],
+                 mean: np.ndarray, edges: np.ndarray, histograms: np.ndarray):
+        self.names = names
+        self.years = years
+        self.iterations = iterations
+        self.seed = seed
+        self.mean = mean              # (portfolios, years) mean wealth multiple
+        self.edges = edges            # (portfolios, years, bins + 1) log-wealth bin edges
+        self.histograms = histograms  # (portfolios, years, bins) path counts
+        self._distributions = {}
+
+    def percentiles(self, qs: Sequence[float] = BAND_PERCENTILES) -> np.ndarray:
+        """
+        Wealth multiple at each percentile, shape (portfolios, years, len(qs)),
+        interpolated linearly in log space within the bin that holds it.
+        """
+        cumulative = np.cumsum(self.histograms, axis=-1)
+        targets = np.asarray(qs, dtype=np.float64) / 100 * self.iterations
+        out = np.empty(self.histograms.shape[:2] + (len(targets),))
+        for p in range(cumulative.shape[0]):
+            for y in range(cumulative.shape[1]):
+                cum, counts, edges = cumulative[p, y], self.histograms[p, y], self.edges[p, y]
+                bins = np.minimum(np.searchsorted(cum, targets, side="left"), len(counts) - 1)
+                below = np.where(bins > 0, cum[bins - 1], 0)
+                inside = np.maximum(counts[bins], 1)
+                fraction = np.clip((targets - below) / inside, 0.0, 1.0)
+                log_value = edges[bins] + fraction * (edges[bins + 1] - edges[bins])
+                out[p, y] = np.exp(log_value)
+        return out
+
+    def distribution(self, bins: int = 50, year: int = -1, coverage: float = 99.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Histogram of the simple return after `year` (default: the last) for
+        every portfolio at once: `(centers, density)`, both (portfolios, bins).
+        Each portfolio gets `bins` equal-width bins spanning the central
+        `coverage` percent of its outcomes; density integrates to the share of
+        paths inside that span. The fine histograms from the simulation pass
+        are re-binned, so no path is revisited, and the result is memoized on
+        this (cached) result.
+        """
+        key = (bins, year, coverage)
+        if key not in self._distributions:
+            tail = (100 - coverage) / 2
+            span = self.percentiles((tail, 100 - tail))[:, year, :] - 1  # (portfolios, 2) simple returns
+            lo, hi = span[:, 0], span[:, 1]
+            width = np.maximum(hi - lo, 1e-12) / bins
+
+            # cumulative path count at every fine edge, read off at the display
+            # edges (linear within a fine bin)
+            fine_edges = np.expm1(self.edges[:, year, :])
+            cumulative = np.zeros(fine_edges.shape)
+            np.cumsum(self.histograms[:, year, :], axis=-1, out=cumulative[:, 1:])
+            display_edges = lo[:, None] + np.arange(bins + 1) * width[:, None]
+            counts = np.diff([np.interp(d, f, c) for d, f, c in zip(display_edges, fine_edges, cumulative)], axis=-1)
+
+            centers = (display_edges[:, :-1] + display_edges[:, 1:]) / 2
+            density = counts / (self.iterations * width[:, None])
+            for array in (centers, density):
+                array.setflags(write=False)
+            self._distributions[key] = (centers, density)
+        return self._distributions[key]
+
+
+def _log_ranges(mu: np.ndarray, sigma: np.ndarray, years: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per (portfolio, year) log-wealth range covering ±8 standard deviations."""
+    t = np.arange(1, years + 1, dtype=np.float64)
+    log_sigma = sigma / (1 + mu)
+    center = (np.log1p(mu) - 0.5 * log_sigma ** 2)[:, None] * t
+    half = 8 * log_sigma[:, None] * np.sqrt(t) + 1e-6
+    return center - half, center + half
+
+
+def simulate_paths(names: List[str], mu: Sequence[float], sigma: Sequence[float], years: int,
+                   iterations: int, seed: Optional[int] = None, chunk_bytes: int = CHUNK_BYTES,
+                   bins: int = HISTOGRAM_BINS) -> SimulationResult:
+    """
+    Compound independent annual returns R ~ N(mu, sigma) over `years` for
+    `iterations` paths per portfolio.
+
+    Paths are drawn in chunks of a `(portfolios, paths, years)` tensor from a
+    `np.random.Generator` seeded with `seed` and compounded with cumprod, so
+    memory stays under `chunk_bytes` however many paths are requested. Only
+    running sums and fixed log-space histograms are kept across chunks; the
+    same seed always gives the same result. A year's return below -100% wipes
+    the path out (wealth floors at 0).
+    """
+    mu = np.asarray(mu, dtype=np.float64)
+    sigma = np.asarray(sigma, dtype=np.float64)
+    n_portfolios = len(mu)
+    rng = np.random.default_rng(seed)
+
+    lo, hi = _log_ranges(mu, sigma, years)
+    width = (hi - lo) / bins
+    counts = np.zeros(n_portfolios * years * bins, dtype=np.int64)
+    totals = np.zeros((n_portfolios, years))
+    # flat histogram offset of each (portfolio, year) cell
+    cell = (np.arange(n_portfolios)[:, None, None] * years + np.arange(years)[None, None, :]) * bins
+
+    chunk = max(1, chunk_bytes // (8 * n_portfolios * years))
+    done = 0
+    while done < iterations:
+        n = min(chunk, iterations - done)
+        returns = rng.normal(mu[:, None, None], sigma[:, None, None], size=(n_portfolios, n, years))
+        np.add(returns, 1.0, out=returns)
+        np.maximum(returns, 0.0, out=returns)
+        wealth = np.cumprod(returns, axis=2, out=returns)
+        totals += wealth.sum(axis=1)
+
+        with np.errstate(divide="ignore"):
+            log_wealth = np.log(wealth, out=wealth)
+        index = (log_wealth - lo[:, None, :]) / width[:, None, :]
+        np.nan_to_num(index, copy=False, neginf=0.0)
+        index = np.clip(index, 0, bins - 1).astype(np.int64)
+        counts += np.bincount((index + cell).ravel(), minlength=counts.size)
+        done += n
+
+    t_edges = np.linspace(0.0, 1.0, bins + 1)
+    edges = lo[:, :, None] + (hi - lo)[:, :, None] * t_edges
+    mean = totals / iterations
+    histograms = counts.reshape(n_portfolios, years, bins)
+    for array in (mean, edges, histograms):
+        array.setflags(write=False)  # results may be memoized and shared between requests
+    return SimulationResult(list(names), years, iterations, seed, mean, edges, histograms)
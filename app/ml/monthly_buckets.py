@@ -0,0 +1,47 @@
+from datetime import date
+from typing import Dict, Tuple
+import numpy as np
+from app.ml.expense_columns import ExpenseColumns, expense_amounts
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()  # datetime64[D] counts days from 1970-01-01
+
+
+def expense_months(expenses) -> np.ndarray:
+    """
+    Calendar month of each expense as datetime64[M].
+    Uses the timestamps' own calendar date, like `strftime("%Y-%m")`, so
+    aware timestamps are bucketed in their own timezone, not shifted to UTC.
+    A datetime64 column is cast directly; Python timestamps only have their
+    day number read (a C-level `toordinal` call each), and the year/month
+    split is done by datetime64 casts.
+    """
+    created = expenses.created_at if isinstance(expenses, ExpenseColumns) else [e['created_at'] for e in expenses]
+    if isinstance(created, np.ndarray) and np.issubdtype(created.dtype, np.datetime64):
+        return created.astype("datetime64[M]")
+    days = np.fromiter(map(date.toordinal, created), dtype=np.int64, count=len(created))
+    return (days - EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]")
+
+
+def bucket_by_month(expenses) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns `(months, codes, totals)`: the sorted distinct months, each
+    expense's index into them, and the total spend per month.
+    np.bincount adds the amounts in input order, so every total is bit-for-bit
+    the sum the per-expense dict loop produced.
+    """
+    months = expense_months(expenses)
+    unique, codes = np.unique(months, return_inverse=True)
+    totals = np.bincount(codes, weights=expense_amounts(expenses), minlength=len(unique))
+    return unique, codes, totals
+
+
+def month_labels(months: np.ndarray) -> list:
+    return np.datetime_as_string(months, unit="M").tolist()
+
+
+def monthly_totals(expenses) -> Dict[str, float]:
+    """{"YYYY-MM": total} in month order, the same shape as the user_monthly_totals rollup."""
+    if not len(expenses):
+        return {}
+    months, _, totals = bucket_by_month(expenses)
+    return dict(zip(month_labels(months), totals.tolist()))
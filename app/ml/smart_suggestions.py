@@ -1,5 +1,5 @@
 from typing import List, Dict
-from collections import Counter
+from app.ml.feature_frame import FinancialFeatureFrame
 
 class SmartSuggestions:
     """
@@ -13,12 +13,10 @@ class SmartSuggestions:
         Analyzes transaction patterns to generate smart lifestyle suggestions.
         """
         suggestions = []
+        frame = FinancialFeatureFrame.of(expenses)
         
         # 1. Frequency Analysis (e.g., Subscriptions or habits)
-        titles = [e['title'].lower() for e in expenses]
-        merchant_counts = Counter(titles)
-        
-        for merchant, count in merchant_counts.items():
+        for merchant, count in zip(frame.merchant_names, frame.merchant_counts.tolist()):
             if count >= 4:  # High frequency
                 if any(k in merchant for k in ["uber", "ola", "transport"]):
                     suggestions.append({
@@ -34,12 +32,10 @@ class SmartSuggestions:
                     })
 
         # 2. Category Concentration
-        categories = [e.get('category') for e in expenses if e.get('category')]
-        cat_counts = Counter(categories)
-        total_expenses = len(expenses)
+        total_expenses = len(frame)
         
-        for cat, count in cat_counts.items():
-            if count / total_expenses > 0.4:  # 40% of transactions in one category
+        for cat, count in zip(frame.category_names, frame.category_counts.tolist()):
+            if cat and count / total_expenses > 0.4:  # 40% of transactions in one category
                 suggestions.append({
                     "category": cat,
                     "insight": f"Over 40% of your transactions are in '{cat}'.",
@@ -0,0 +1,155 @@
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class RunningStats:
+    """Welford's running count/mean/variance; O(1) memory and update."""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation (same as np.std)."""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate with the P² algorithm (Jain & Chlamtac, 1985):
+    five markers track the minimum, p/2, p, (1+p)/2 quantiles and maximum.
+    The first five observations are kept as-is, so small samples are exact.
+    """
+
+    __slots__ = ("p", "count", "q", "n", "desired")
+
+    def __init__(self, p: float = 0.5, count: int = 0, q: Optional[List[float]] = None,
+                 n: Optional[List[float]] = None, desired: Optional[List[float]] = None):
+        self.p = p
+        self.count = count
+        self.q = q if q is not None else []  # marker heights
+        self.n = n if n is not None else [0, 1, 2, 3, 4]  # marker positions
+        self.desired = desired if desired is not None else [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+
+    @property
+    def _dn(self):
+        p = self.p
+        return (0, p / 2, p, (1 + p) / 2, 1)
+
+    def add(self, x: float):
+        self.count += 1
+        q, n = self.q, self.n
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i, dn in enumerate(self._dn):
+            self.desired[i] += dn
+
+        for i in range(1, 4):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = self._parabolic(i, d)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def _parabolic(self, i: int, d: int) -> float:
+        q, n = self.q, self.n
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def exact(self) -> bool:
+        return self.count <= 5
+
+    def value(self) -> Optional[float]:
+        if not self.count:
+            return None
+        if self.exact:
+            return float(np.quantile(self.q, self.p))
+        return self.q[2]
+
+    def to_state(self) -> Dict:
+        # "np" (the paper's n') is the stored key for the desired positions
+        return {"p": self.p, "count": self.count, "q": list(self.q), "n": list(self.n), "np": list(self.desired)}
+
+    @classmethod
+    def from_state(cls, state: Optional[Dict]) -> "P2Quantile":
+        if not state:
+            return cls()
+        return cls(state["p"], state["count"], list(state["q"]), list(state["n"]), list(state["np"]))
+
+
+class MerchantStats:
+    """
+    Online baseline of one merchant's amounts: running mean/variance plus
+    streaming median and MAD. The MAD is tracked as the median of each new
+    amount's distance from the median estimate before it; while five or fewer
+    amounts have been seen both are exact.
+    """
+
+    __slots__ = ("running", "median", "deviation")
+
+    def __init__(self, running: Optional[RunningStats] = None, median: Optional[P2Quantile] = None,
+                 deviation: Optional[P2Quantile] = None):
+        self.running = running or RunningStats()
+        self.median = median or P2Quantile()
+        self.deviation = deviation or P2Quantile()
+
+    @property
+    def count(self) -> int:
+        return self.running.count
+
+    def add(self, x: float):
+        current = self.median.value()
+        if current is not None:
+            self.deviation.add(abs(x - current))
+        self.running.add(x)
+        self.median.add(x)
+
+    def mad(self) -> Optional[float]:
+        if self.median.exact:
+            if not self.median.count:
+                return None
+            med = self.median.value()
+            return float(np.median([abs(x - med) for x in self.median.q]))
+        return self.deviation.value()
+
+    def sketch(self) -> Dict:
+        return {"median": self.median.to_state(), "deviation": self.deviation.to_state()}
+
+    @classmethod
+    def from_parts(cls, count: int, mean: float, m2: float, sketch: Optional[Dict]) -> "MerchantStats":
+        sketch = sketch or {}
+        return cls(RunningStats(count, mean, m2),
+                   P2Quantile.from_state(sketch.get("median")),
+                   P2Quantile.from_state(sketch.get("deviation")))
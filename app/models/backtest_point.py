@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, UniqueConstraint
+from app.core.database import Base
+
+
+class ForecastBacktestPoint(Base):
+    """
+    One walk-forward backtest point per user and completed month ("YYYY-MM"):
+    the month's actual spend and what the forecaster predicted for it from the
+    months before. Stored so the forecast-vs-actual series only ever computes
+    the newest month.
+    """
+
+    __tablename__ = "forecast_backtest_points"
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", name="uq_forecast_backtest_points_user_month"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(String(7), nullable=False)
+    actual = Column(Float, nullable=False)
+    forecast = Column(Float, nullable=False)
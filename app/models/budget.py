@@ -9,7 +9,7 @@ class Budget(Base):
     __tablename__ = "budgets"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     category = Column(String, nullable=False)
     limit_amount = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,18 +1,43 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from app.models.user import User
 
 
+class UTCDateTime(TypeDecorator):
+    """
+    DateTime(timezone=True) that binds aware values in UTC. SQLite stores the
+    wall-clock time and drops the offset, so without this its month buckets
+    would disagree with `month_key`, which buckets in UTC.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc)
+        return value
+
+
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index("ix_expenses_user_id_created_at", "user_id", "created_at"),
+        Index("ix_expenses_user_id_category", "user_id", "category"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
     amount = Column(Float, nullable=False)
     category = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Python-side default keeps the stored format identical to bound parameters,
+    # which keyset pagination on (created_at, id) relies on (notably on SQLite).
+    created_at = Column(UTCDateTime(), server_default=func.now(),
+                        default=lambda: datetime.now(timezone.utc))
 
     user = relationship("User", back_populates="expenses")
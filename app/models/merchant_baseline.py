@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON, UniqueConstraint
+from app.core.database import Base
+
+
+class MerchantBaseline(Base):
+    """
+    Running spend statistics per user and merchant (lowercased title), used to
+    score new expenses at insert time. The row with merchant "*" covers all of
+    the user's expenses.
+    """
+
+    __tablename__ = "merchant_baselines"
+    __table_args__ = (
+        UniqueConstraint("user_id", "merchant", name="uq_merchant_baselines_user_merchant"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    merchant = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0.0)
+    m2 = Column(Float, nullable=False, default=0.0)  # sum of squared deviations (Welford)
+    sketch = Column(JSON, nullable=True)  # P² median/MAD marker state
+    anomalies = Column(Integer, nullable=False, default=0, server_default="0")  # expenses flagged when added
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, UniqueConstraint
+from app.core.database import Base
+
+
+class UserMonthlyTotal(Base):
+    """Per-user spend rollup by month ("YYYY-MM") and category."""
+
+    __tablename__ = "user_monthly_totals"
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", "category", name="uq_user_monthly_totals_user_month_category"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(String(7), nullable=False)
+    category = Column(String, nullable=False)
+    total = Column(Float, nullable=False, default=0.0)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,46 @@
+from typing import Dict, Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.models.backtest_point import ForecastBacktestPoint
+from app.repository.monthly_total_repository import _upsert_insert
+
+
+def get_backtest_points(db: Session, user_id: int) -> Dict[str, Tuple[float, float]]:
+    """Stored {"YYYY-MM": (actual, forecast)} points of a user, in month order."""
+    rows = db.execute(
+        select(ForecastBacktestPoint.month, ForecastBacktestPoint.actual, ForecastBacktestPoint.forecast)
+        .where(ForecastBacktestPoint.user_id == user_id)
+        .order_by(ForecastBacktestPoint.month)
+    ).all()
+    return {month: (actual, forecast) for month, actual, forecast in rows}
+
+
+def save_backtest_points(db: Session, user_id: int, points: Dict[str, Tuple[float, float]]):
+    """Insert new points; a point a concurrent request already stored is kept. The caller commits."""
+    if not points:
+        return
+    rows = [{"user_id": user_id, "month": month, "actual": actual, "forecast": forecast}
+            for month, (actual, forecast) in points.items()]
+    insert_fn = _upsert_insert(db)
+    if insert_fn is not None:
+        db.execute(insert_fn(ForecastBacktestPoint).values(rows)
+                   .on_conflict_do_nothing(index_elements=["user_id", "month"]))
+        return
+    # generic fallback for dialects without ON CONFLICT
+    for row in rows:
+        db.add(ForecastBacktestPoint(**row))
+    db.flush()
+
+
+def invalidate_backtest_points(db: Session, user_id: Optional[int], since_month: Optional[str] = None):
+    """
+    Drop a user's points from `since_month` on (all of them if None; every
+    user's if `user_id` is None). A write to a past month changes that month's
+    actual and every later forecast. Runs in the caller's transaction.
+    """
+    stmt = delete(ForecastBacktestPoint)
+    if user_id is not None:
+        stmt = stmt.where(ForecastBacktestPoint.user_id == user_id)
+    if since_month is not None:
+        stmt = stmt.where(ForecastBacktestPoint.month >= since_month)
+    db.execute(stmt)
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.budget import Budget
 
@@ -12,3 +14,16 @@ def create_budget(db: Session, user_id: int, budget_data: dict):
 
 def get_budgets_by_user(db: Session, user_id: int):
     return db.query(Budget).filter(Budget.user_id == user_id).all()
+
+
+async def create_budget_async(db: AsyncSession, user_id: int, budget_data: dict):
+    budget = Budget(user_id=user_id, **budget_data)
+    db.add(budget)
+    await db.commit()
+    await db.refresh(budget)
+    return budget
+
+
+async def get_budgets_by_user_async(db: AsyncSession, user_id: int):
+    result = await db.scalars(select(Budget).where(Budget.user_id == user_id))
+    return result.all()
@@ -1,14 +1,108 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.expense import Expense
+from app.ml.expense_columns import ExpenseColumns
 
 
-def create_expense(db: Session, user_id: int, expense_data: dict):
+def create_expense(db: Session, user_id: int, expense_data: dict, commit: bool = True):
     expense = Expense(user_id=user_id, **expense_data)
     db.add(expense)
+    if not commit:
+        db.flush()
+        return expense
     db.commit()
     db.refresh(expense)
     return expense
 
 
-def get_expenses_by_user(db: Session, user_id: int):
-    return db.query(Expense).filter(Expense.user_id == user_id).all()
+def insert_expenses(db: Session, user_id: int, rows: List[dict]) -> List[int]:
+    """Insert many expenses with one multi-row INSERT and return their ids in order.
+
+    Does not commit; bulk imports commit once for the whole request.
+    """
+    if not rows:
+        return []
+    stmt = insert(Expense).returning(Expense.id, sort_by_parameter_order=True)
+    result = db.execute(stmt, [{"user_id": user_id, **row} for row in rows])
+    return list(result.scalars())
+
+
+def _filter_expenses(query, user_id: int, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None, category: Optional[str] = None):
+    query = query.filter(Expense.user_id == user_id)
+    if since is not None:
+        query = query.filter(Expense.created_at >= since)
+    if until is not None:
+        query = query.filter(Expense.created_at < until)
+    if category is not None:
+        query = query.filter(Expense.category == category)
+    return query
+
+
+def get_expenses_by_user(db: Session, user_id: int, since: Optional[datetime] = None,
+                         until: Optional[datetime] = None, category: Optional[str] = None):
+    return _filter_expenses(db.query(Expense), user_id, since, until, category).all()
+
+
+def get_expense_columns(db: Session, user_id: int, since: Optional[datetime] = None,
+                        until: Optional[datetime] = None, category: Optional[str] = None) -> ExpenseColumns:
+    """Load only the fields the ML engines read, as columns, without hydrating ORM objects."""
+    stmt = select(Expense.id, Expense.amount, Expense.title, Expense.category, Expense.created_at)
+    stmt = _filter_expenses(stmt, user_id, since, until, category).order_by(Expense.id)
+    return ExpenseColumns.from_rows(db.execute(stmt))
+
+
+def get_expenses_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    category: Optional[str] = None,
+) -> Tuple[List[Expense], Optional[Tuple[datetime, int]]]:
+    """Return one newest-first page of expenses using keyset pagination.
+
+    `after` is the `(created_at, id)` of the last row of the previous page.
+    The second element of the result is the key to pass for the next page,
+    or None when there are no more rows.
+    """
+    query = _page_query(db.query(Expense), user_id, limit, after, since, until, category)
+    return _split_page(query.all(), limit)
+
+
+def _page_query(query, user_id, limit, after, since, until, category):
+    query = _filter_expenses(query, user_id, since, until, category)
+    if after is not None:
+        query = query.filter(tuple_(Expense.created_at, Expense.id) < tuple_(*after))
+    return query.order_by(Expense.created_at.desc(), Expense.id.desc()).limit(limit + 1)
+
+
+def _split_page(rows, limit):
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1].created_at, rows[-1].id)
+
+
+async def get_expenses_by_user_async(db: AsyncSession, user_id: int, since: Optional[datetime] = None,
+                                     until: Optional[datetime] = None, category: Optional[str] = None):
+    result = await db.scalars(_filter_expenses(select(Expense), user_id, since, until, category))
+    return result.all()
+
+
+async def get_expenses_page_async(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    after: Optional[Tuple[datetime, int]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    category: Optional[str] = None,
+) -> Tuple[List[Expense], Optional[Tuple[datetime, int]]]:
+    """Async variant of `get_expenses_page`."""
+    result = await db.scalars(_page_query(select(Expense), user_id, limit, after, since, until, category))
+    return _split_page(result.all(), limit)
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.goal import Goal
 from app.schemas.goal import GoalCreate, GoalUpdate
@@ -37,3 +39,40 @@ def delete_goal(db: Session, goal_id: int):
         db.commit()
         return True
     return False
+
+
+async def get_goal_async(db: AsyncSession, goal_id: int):
+    return await db.get(Goal, goal_id)
+
+
+async def get_goals_by_user_async(db: AsyncSession, user_id: int):
+    result = await db.scalars(select(Goal).where(Goal.user_id == user_id))
+    return result.all()
+
+
+async def create_goal_async(db: AsyncSession, goal: GoalCreate, user_id: int):
+    db_goal = Goal(**goal.model_dump(), user_id=user_id)
+    db.add(db_goal)
+    await db.commit()
+    await db.refresh(db_goal)
+    return db_goal
+
+
+async def update_goal_async(db: AsyncSession, goal_id: int, goal_update: GoalUpdate):
+    db_goal = await db.get(Goal, goal_id)
+    if db_goal:
+        update_data = goal_update.model_dump(exclude_unset=True)
+        for key, value in update_data.items():
+            setattr(db_goal, key, value)
+        await db.commit()
+        await db.refresh(db_goal)
+    return db_goal
+
+
+async def delete_goal_async(db: AsyncSession, goal_id: int):
+    db_goal = await db.get(Goal, goal_id)
+    if db_goal:
+        await db.delete(db_goal)
+        await db.commit()
+        return True
+    return False
@@ -0,0 +1,109 @@
+from typing import Dict, Iterable, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.models.expense import Expense
+from app.models.merchant_baseline import MerchantBaseline
+from app.ml.anomaly_detector import AnomalyDetector
+from app.ml.streaming_stats import MerchantStats
+from app.repository.monthly_total_repository import _upsert_insert
+
+ALL_MERCHANTS = "*"
+
+
+def merchant_key(title: Optional[str]) -> str:
+    """Baselines group expenses by lowercased title, like the batch detector."""
+    return (title or "").lower()
+
+
+def lock_merchant_baselines(db: Session, user_id: int, merchants: Iterable[str]) -> Dict[str, MerchantBaseline]:
+    """Return the user's baseline rows for `merchants`, creating empty ones, locked for update.
+
+    Runs in the caller's transaction so baselines commit together with the
+    expenses that updated them.
+    """
+    merchants = set(merchants)
+    insert_fn = _upsert_insert(db)
+    if insert_fn is not None:
+        db.execute(
+            insert_fn(MerchantBaseline)
+            .values([{"user_id": user_id, "merchant": m, "count": 0, "mean": 0.0, "m2": 0.0, "anomalies": 0}
+                     for m in merchants])
+            .on_conflict_do_nothing(index_elements=["user_id", "merchant"])
+        )
+    rows = (
+        db.query(MerchantBaseline)
+        .filter(MerchantBaseline.user_id == user_id, MerchantBaseline.merchant.in_(merchants))
+        .with_for_update()
+        .all()
+    )
+    found = {row.merchant: row for row in rows}
+    for merchant in merchants - found.keys():
+        # generic fallback for dialects without ON CONFLICT
+        found[merchant] = MerchantBaseline(user_id=user_id, merchant=merchant, count=0, mean=0.0, m2=0.0,
+                                           anomalies=0)
+        db.add(found[merchant])
+    return found
+
+
+def baseline_stats(row: MerchantBaseline) -> MerchantStats:
+    return MerchantStats.from_parts(row.count or 0, row.mean or 0.0, row.m2 or 0.0, row.sketch)
+
+
+def store_baseline_stats(row: MerchantBaseline, stats: MerchantStats):
+    row.count = stats.running.count
+    row.mean = stats.running.mean
+    row.m2 = stats.running.m2
+    row.sketch = stats.sketch()
+
+
+def fold_expense(merchant: MerchantStats, overall: MerchantStats, title: str, amount: float,
+                 counts_overall: bool = True) -> Optional[Dict]:
+    """Add one expense to its merchant's and the overall baseline, then score it against them."""
+    merchant.add(amount)
+    if counts_overall:
+        overall.add(amount)
+    return AnomalyDetector.score_new_expense(title, amount, merchant, overall)
+
+
+def anomaly_count(db: Session, user_id: int) -> int:
+    """Number of the user's expenses flagged as anomalies when they were added."""
+    count = db.execute(
+        select(MerchantBaseline.anomalies)
+        .where(MerchantBaseline.user_id == user_id, MerchantBaseline.merchant == ALL_MERCHANTS)
+    ).scalar()
+    return count or 0
+
+
+def rebuild_merchant_baselines(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute baselines from raw expenses (all users, or one user) in insertion order.
+
+    Replaces existing baseline rows in the same transaction and returns the
+    number of rows written. The caller commits.
+    """
+    source = select(Expense.user_id, Expense.title, Expense.amount).order_by(Expense.user_id, Expense.id)
+    clear = delete(MerchantBaseline)
+    if user_id is not None:
+        source = source.where(Expense.user_id == user_id)
+        clear = clear.where(MerchantBaseline.user_id == user_id)
+
+    # every expense is scored as it is folded in, as if it had just been added
+    baselines = {}
+    flagged = {}
+    for uid, title, amount in db.execute(source.execution_options(yield_per=5000)):
+        key = merchant_key(title)
+        for merchant in (key, ALL_MERCHANTS):
+            if (uid, merchant) not in baselines:
+                baselines[(uid, merchant)] = MerchantStats()
+        anomaly = fold_expense(baselines[(uid, key)], baselines[(uid, ALL_MERCHANTS)], title, amount,
+                               counts_overall=key != ALL_MERCHANTS)
+        if anomaly:
+            for merchant in {key, ALL_MERCHANTS}:
+                flagged[(uid, merchant)] = flagged.get((uid, merchant), 0) + 1
+
+    db.execute(clear)
+    for (uid, merchant), stats in baselines.items():
+        row = MerchantBaseline(user_id=uid, merchant=merchant, anomalies=flagged.get((uid, merchant), 0))
+        store_baseline_stats(row, stats)
+        db.add(row)
+    db.flush()
+    return len(baselines)
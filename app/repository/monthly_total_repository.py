@@ -0,0 +1,172 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import delete, extract, func, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.expense import Expense
+from app.models.monthly_total import UserMonthlyTotal
+
+UNCATEGORIZED = "uncategorized"
+
+
+def month_key(ts: datetime) -> str:
+    """Month bucket ("YYYY-MM") of a timestamp; aware values are bucketed in UTC."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return ts.strftime("%Y-%m")
+
+
+def _upsert_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+
+def increment_monthly_totals(db: Session, user_id: int, expenses: Iterable[dict]):
+    """Add expenses (dicts with amount/category/created_at) to the monthly rollup.
+
+    Runs in the caller's transaction so the rollup commits together with the
+    expenses themselves.
+    """
+    deltas = {}
+    for exp in expenses:
+        key = (month_key(exp["created_at"]), exp.get("category") or UNCATEGORIZED)
+        total, count = deltas.get(key, (0.0, 0))
+        deltas[key] = (total + exp["amount"], count + 1)
+    if not deltas:
+        return
+
+    rows = [
+        {"user_id": user_id, "month": month, "category": category, "total": total, "count": count}
+        for (month, category), (total, count) in deltas.items()
+    ]
+    insert_fn = _upsert_insert(db)
+    if insert_fn is not None:
+        stmt = insert_fn(UserMonthlyTotal).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "month", "category"],
+            set_={
+                "total": UserMonthlyTotal.total + stmt.excluded.total,
+                "count": UserMonthlyTotal.count + stmt.excluded.count,
+            },
+        )
+        db.execute(stmt)
+        return
+
+    # generic fallback for dialects without ON CONFLICT
+    for row in rows:
+        existing = (
+            db.query(UserMonthlyTotal)
+            .filter_by(user_id=user_id, month=row["month"], category=row["category"])
+            .with_for_update()
+            .first()
+        )
+        if existing:
+            existing.total += row["total"]
+            existing.count += row["count"]
+        else:
+            db.add(UserMonthlyTotal(**row))
+    db.flush()
+
+
+def get_monthly_totals(db: Session, user_id: int) -> Dict[str, float]:
+    """Total spend per month for a user, in month order."""
+    rows = db.execute(
+        select(UserMonthlyTotal.month, func.sum(UserMonthlyTotal.total))
+        .where(UserMonthlyTotal.user_id == user_id)
+        .group_by(UserMonthlyTotal.month)
+        .order_by(UserMonthlyTotal.month)
+    ).all()
+    return {month: float(total) for month, total in rows}
+
+
+def lock_monthly_totals(db: Session, user_id: int) -> Dict[str, float]:
+    """
+    `get_monthly_totals`, reading the rollup rows FOR SHARE: until the caller's
+    transaction ends, a concurrent write to an existing month waits.
+    """
+    rows = db.execute(
+        select(UserMonthlyTotal.month, UserMonthlyTotal.total)
+        .where(UserMonthlyTotal.user_id == user_id)
+        .order_by(UserMonthlyTotal.month)
+        .with_for_update(read=True)
+    ).all()
+    totals = {}
+    for month, total in rows:
+        totals[month] = totals.get(month, 0.0) + float(total)
+    return totals
+
+
+def get_monthly_category_totals(db: Session, user_id: int) -> List[Dict]:
+    rows = db.execute(
+        select(UserMonthlyTotal.month, UserMonthlyTotal.category, UserMonthlyTotal.total, UserMonthlyTotal.count)
+        .where(UserMonthlyTotal.user_id == user_id)
+        .order_by(UserMonthlyTotal.month, UserMonthlyTotal.category)
+    ).all()
+    return [{"month": m, "category": c, "total": t, "count": n} for m, c, t, n in rows]
+
+
+def _month_expr(dialect: str):
+    """
+    "YYYY-MM" of Expense.created_at in UTC, as `month_key` buckets it; None
+    for dialects without a known formatting function.
+    """
+    if dialect == "postgresql":
+        return func.to_char(func.timezone("UTC", Expense.created_at), "YYYY-MM")
+    if dialect == "sqlite":
+        # timestamps are stored as UTC wall-clock time (see UTCDateTime)
+        return func.strftime("%Y-%m", Expense.created_at)
+    return None
+
+
+def rebuild_monthly_totals(db: Session, user_id: Optional[int] = None) -> int:
+    """Recompute the rollup from raw expenses (all users, or one user).
+
+    Replaces existing rollup rows in the same transaction and returns the
+    number of rows written. The caller commits.
+    """
+    category = func.coalesce(Expense.category, literal(UNCATEGORIZED)).label("category")
+    clear = delete(UserMonthlyTotal)
+    if user_id is not None:
+        clear = clear.where(UserMonthlyTotal.user_id == user_id)
+    db.execute(clear)
+
+    month = _month_expr(db.get_bind().dialect.name)
+    if month is None:
+        return _rebuild_portably(db, user_id, category)
+
+    month = month.label("month")
+    source = (
+        select(Expense.user_id, month, category, func.sum(Expense.amount), func.count(Expense.id))
+        .where(Expense.created_at.is_not(None))
+        .group_by(Expense.user_id, month, category)
+    )
+    if user_id is not None:
+        source = source.where(Expense.user_id == user_id)
+    result = db.execute(
+        insert(UserMonthlyTotal).from_select(["user_id", "month", "category", "total", "count"], source)
+    )
+    return result.rowcount
+
+
+def _rebuild_portably(db: Session, user_id: Optional[int], category) -> int:
+    """Rollup rebuild grouping on extract(year/month), formatted in Python (timestamps taken as UTC)."""
+    year = extract("year", Expense.created_at).label("year")
+    month = extract("month", Expense.created_at).label("month")
+    source = (
+        select(Expense.user_id, year, month, category, func.sum(Expense.amount), func.count(Expense.id))
+        .where(Expense.created_at.is_not(None))
+        .group_by(Expense.user_id, year, month, category)
+    )
+    if user_id is not None:
+        source = source.where(Expense.user_id == user_id)
+    rows = [
+        {"user_id": uid, "month": f"{int(y):04d}-{int(m):02d}", "category": cat, "total": total, "count": count}
+        for uid, y, m, cat, total, count in db.execute(source)
+    ]
+    if rows:
+        db.execute(insert(UserMonthlyTotal), rows)
+    return len(rows)
@@ -0,0 +1,93 @@
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models.budget import Budget
+from app.models.user import User
+from app.ml.expense_columns import ExpenseColumns
+from app.repository.expense_repository import get_expense_columns
+
+DEFAULT_INCOME = 5000.0  # fallback for simulation when the user has no profile
+
+
+class UserFinancialSnapshot:
+    """Profile, budgets and expenses of one user, read together in one transaction."""
+
+    __slots__ = ("user_id", "found", "income", "savings", "risk_tolerance",
+                 "total_budget", "category_budgets", "expenses", "recent_expenses")
+
+    def __init__(self, user_id: int, found: bool, income: float, savings: float, risk_tolerance: str,
+                 total_budget: float, category_budgets: Dict[str, float], expenses: ExpenseColumns,
+                 recent_expenses: Optional[ExpenseColumns] = None):
+        self.user_id = user_id
+        self.found = found
+        self.income = income
+        self.savings = savings
+        self.risk_tolerance = risk_tolerance
+        self.total_budget = total_budget
+        self.category_budgets = category_budgets
+        self.expenses = expenses
+        self.recent_expenses = recent_expenses
+
+    def profile(self) -> Dict:
+        """Profile dict in the shape the assistant helpers expect."""
+        profile = {
+            "income": self.income,
+            "monthly_savings": self.savings,
+            "risk_tolerance": self.risk_tolerance,
+        }
+        if self.total_budget > 0:
+            profile["monthly_budget"] = self.total_budget
+        return profile
+
+
+def load_user_snapshot(db: Session, user_id: int, since: Optional[datetime] = None,
+                       recent_since: Optional[datetime] = None) -> UserFinancialSnapshot:
+    """
+    Load everything the ML routes need for a user.
+
+    `since` limits the expense window; `recent_since` additionally loads a
+    shorter window (e.g. the chat advisor's last 30 days). Budget totals are
+    summed in SQL. On PostgreSQL the reads run under REPEATABLE READ so every
+    part of the snapshot sees the same data.
+    """
+    if db.get_bind().dialect.name == "postgresql" and not db.in_transaction():
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+    total_budget = (
+        select(func.coalesce(func.sum(Budget.limit_amount), 0.0))
+        .where(Budget.user_id == user_id)
+        .scalar_subquery()
+    )
+    profile = db.execute(
+        select(User.monthly_income, User.monthly_savings, User.risk_tolerance, total_budget)
+        .where(User.id == user_id)
+    ).first()
+
+    category_budgets = {
+        category: float(limit)
+        for category, limit in db.execute(
+            select(Budget.category, func.sum(Budget.limit_amount))
+            .where(Budget.user_id == user_id)
+            .group_by(Budget.category)
+        )
+    }
+
+    expenses = get_expense_columns(db, user_id, since=since)
+    recent = get_expense_columns(db, user_id, since=recent_since) if recent_since is not None else None
+
+    if profile is None:
+        return UserFinancialSnapshot(user_id, False, DEFAULT_INCOME, 0.0, "Moderate",
+                                     sum(category_budgets.values()), category_budgets, expenses, recent)
+    income, savings, risk, budget_sum = profile
+    return UserFinancialSnapshot(user_id, True, income, savings or 0.0, risk or "Moderate",
+                                 float(budget_sum), category_budgets, expenses, recent)
+
+
+def load_budget_and_income(db: Session, user_id: int) -> Tuple[float, float]:
+    """`(total_budget, income)` as `load_user_snapshot` reports them, without reading any expenses."""
+    total_budget = db.execute(
+        select(func.coalesce(func.sum(Budget.limit_amount), 0.0)).where(Budget.user_id == user_id)
+    ).scalar_one()
+    profile = db.execute(select(User.monthly_income).where(User.id == user_id)).first()
+    return float(total_budget), (profile[0] if profile is not None else DEFAULT_INCOME)
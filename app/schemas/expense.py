@@ -9,6 +9,21 @@ class ExpenseCreate(BaseModel):
     category: Optional[str] = None
 
 
+class ExpenseImportRow(ExpenseCreate):
+    """One row of a bulk import; statements usually carry the booking date."""
+    created_at: Optional[datetime] = None
+
+
+class ExpenseAnomaly(BaseModel):
+    """Insert-time anomaly score against the merchant's running baseline."""
+    expense_id: Optional[int] = None
+    title: str
+    amount: float
+    z_score: float
+    anomaly_probability: float
+    reason: str
+
+
 class ExpenseResponse(BaseModel):
     id: int
     user_id: int
@@ -16,6 +31,7 @@ class ExpenseResponse(BaseModel):
     amount: float
     category: Optional[str]
     created_at: datetime
+    anomaly: Optional[ExpenseAnomaly] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,29 @@
+import argparse
+from app.core.database import SessionLocal
+# import every mapped model so the User relationships can be configured
+from app.models.user import User
+from app.models.expense import Expense
+from app.models.budget import Budget
+from app.models.goal import Goal
+from app.repository.merchant_baseline_repository import rebuild_merchant_baselines
+
+
+def backfill(user_id: int = None):
+    db = SessionLocal()
+    try:
+        scope = f"user {user_id}" if user_id else "all users"
+        print(f"Rebuilding merchant baselines for {scope}...")
+        rows = rebuild_merchant_baselines(db, user_id)
+        db.commit()
+        print(f"Backfill successful: {rows} baseline rows written.")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild merchant_baselines from raw expenses.")
+    parser.add_argument("--user-id", type=int, default=None)
+    backfill(parser.parse_args().user_id)
@@ -0,0 +1,38 @@
+import argparse
+from sqlalchemy import select
+from app.core.cache_manager import CacheManager
+from app.core.database import SessionLocal
+# import every mapped model so the User relationships can be configured
+from app.models.user import User
+from app.models.expense import Expense
+from app.models.budget import Budget
+from app.models.goal import Goal
+from app.repository.backtest_repository import invalidate_backtest_points
+from app.repository.monthly_total_repository import rebuild_monthly_totals
+
+
+def backfill(user_id: int = None):
+    db = SessionLocal()
+    try:
+        scope = f"user {user_id}" if user_id else "all users"
+        print(f"Rebuilding monthly totals for {scope}...")
+        rows = rebuild_monthly_totals(db, user_id)
+        # stored forecast-vs-actual points were computed from the old rollup
+        invalidate_backtest_points(db, user_id)
+        db.commit()
+        # results cached from the old rollup (forecasts, model metrics) must not be served again
+        user_ids = [user_id] if user_id else db.scalars(select(User.id)).all()
+        for uid in user_ids:
+            CacheManager.bump_data_version(uid)
+        print(f"Backfill successful: {rows} rollup rows written, cache invalidated for {len(user_ids)} user(s).")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild user_monthly_totals from raw expenses.")
+    parser.add_argument("--user-id", type=int, default=None)
+    backfill(parser.parse_args().user_id)
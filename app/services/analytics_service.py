@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.ml.analytics import AnalyticsEngine
+from app.repository.backtest_repository import get_backtest_points, invalidate_backtest_points, save_backtest_points
+from app.repository.monthly_total_repository import get_monthly_totals, lock_monthly_totals, month_key
+
+
+def forecast_vs_actual(db: Session, user_id: int, now: Optional[datetime] = None) -> List[Dict]:
+    """
+    Forecast-vs-actual series from the monthly rollup and the stored backtest
+    points. Stored points are reused while they match the rollup; only months
+    completed since the last call, or points gone stale, are backtested (and stored).
+    """
+    current_month = month_key(now or datetime.now(timezone.utc))
+    monthly_totals = get_monthly_totals(db, user_id)
+    stored = get_backtest_points(db, user_id)
+    points = AnalyticsEngine.reusable_points(monthly_totals, current_month, stored)
+    if len(points) == len(stored) and not AnalyticsEngine.backtest_points(monthly_totals, current_month, stored=points):
+        return AnalyticsEngine.get_forecast_vs_actual(monthly_totals, points, current_month)
+
+    # Recompute from rollup rows locked until the commit: a concurrent backdated
+    # write then either lands before this read or waits and drops what is stored here.
+    monthly_totals = lock_monthly_totals(db, user_id)
+    stored = get_backtest_points(db, user_id)
+    points = AnalyticsEngine.reusable_points(monthly_totals, current_month, stored)
+    stale = [month for month in stored if month not in points]
+    if stale:
+        invalidate_backtest_points(db, user_id, since_month=min(stale))
+    new_points = AnalyticsEngine.backtest_points(monthly_totals, current_month, stored=points)
+    save_backtest_points(db, user_id, new_points)
+    db.commit()
+    points.update(new_points)
+    return AnalyticsEngine.get_forecast_vs_actual(monthly_totals, points, current_month)
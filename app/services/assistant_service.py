@@ -7,6 +7,8 @@ logger = logging.getLogger(__name__)
 
 
 class AssistantService:
+    DEFAULT_PROFILE = {"income": 5000, "monthly_savings": 1000}
+
     def __init__(self):
         self.engine = DecisionEngine()
 
@@ -90,6 +92,11 @@ class AssistantService:
         color = "green" if months >= 6 else "yellow" if months >= 3 else "red"
         return {"months_covered": months, "status_color": color, "details": ef}
 
+    def summary_from_snapshot(self, snapshot) -> Dict[str, Any]:
+        """Summary for a `UserFinancialSnapshot`; unknown users keep the demo profile defaults."""
+        profile = snapshot.profile() if snapshot.found else dict(self.DEFAULT_PROFILE)
+        return self.summary(profile, snapshot.expenses)
+
     def summary(self, profile: Dict[str, Any], expenses: List[Dict[str, Any]]) -> Dict[str, Any]:
         # Compose a short assistant summary using multiple helpers and DecisionEngine
         de = self.engine.evaluate(expenses, profile)
@@ -1,10 +1,30 @@
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.repository.budget_repository import create_budget, get_budgets_by_user
+from app.core.cache_manager import CacheManager
+from app.repository.budget_repository import (
+    create_budget,
+    create_budget_async,
+    get_budgets_by_user,
+    get_budgets_by_user_async,
+)
 
 
 def add_budget(db: Session, user_id: int, budget_data: dict):
-    return create_budget(db, user_id, budget_data)
+    budget = create_budget(db, user_id, budget_data)
+    CacheManager.bump_data_version(user_id)
+    return budget
 
 
 def list_budgets(db: Session, user_id: int):
     return get_budgets_by_user(db, user_id)
+
+
+async def add_budget_async(db: AsyncSession, user_id: int, budget_data: dict):
+    budget = await create_budget_async(db, user_id, budget_data)
+    await asyncio.to_thread(CacheManager.bump_data_version, user_id)
+    return budget
+
+
+async def list_budgets_async(db: AsyncSession, user_id: int):
+    return await get_budgets_by_user_async(db, user_id)
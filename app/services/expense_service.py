@@ -1,13 +1,168 @@
+import base64
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.repository.expense_repository import create_expense, get_expenses_by_user
+from app.repository.expense_repository import (
+    create_expense,
+    get_expenses_by_user,
+    get_expenses_by_user_async,
+    get_expenses_page,
+    get_expenses_page_async,
+    insert_expenses,
+)
+from app.repository.merchant_baseline_repository import (
+    ALL_MERCHANTS,
+    baseline_stats,
+    fold_expense,
+    lock_merchant_baselines,
+    merchant_key,
+    store_baseline_stats,
+)
+from app.repository.backtest_repository import invalidate_backtest_points
+from app.repository.monthly_total_repository import increment_monthly_totals, month_key
+from app.schemas.expense import ExpenseImportRow
+from app.core.cache_manager import CacheManager
 from app.ml.categorizer import MerchantCategorizer
 
+BULK_CHUNK_SIZE = 1000
+
+
+def categorize_titles(titles: List[str]) -> List[str]:
+    """Return the category label (the only part that is stored) for each title, in one batch."""
+    return [r["category"] for r in MerchantCategorizer.categorize_many(titles)]
+
+
+def _score_and_update_baselines(db: Session, user_id: int, rows: List[Dict]) -> List[Optional[Dict]]:
+    """Fold each new row into its merchant's baseline and the user's overall one, then score it."""
+    keys = [merchant_key(row["title"]) for row in rows]
+    locked = lock_merchant_baselines(db, user_id, set(keys) | {ALL_MERCHANTS})
+    stats = {merchant: baseline_stats(baseline) for merchant, baseline in locked.items()}
+    overall = stats[ALL_MERCHANTS]
+    anomalies = []
+    for key, row in zip(keys, rows):
+        anomaly = fold_expense(stats[key], overall, row["title"], row["amount"], counts_overall=key != ALL_MERCHANTS)
+        if anomaly:
+            for merchant in {key, ALL_MERCHANTS}:
+                locked[merchant].anomalies = (locked[merchant].anomalies or 0) + 1
+        anomalies.append(anomaly)
+    for merchant, merchant_stats in stats.items():
+        store_baseline_stats(locked[merchant], merchant_stats)
+    return anomalies
+
+
+def _invalidate_past_backtests(db: Session, user_id: int, rows: List[Dict]):
+    """Writes dated in a completed month change its stored backtest point and every later one."""
+    earliest = min(month_key(row["created_at"]) for row in rows)
+    if earliest < month_key(datetime.now(timezone.utc)):
+        invalidate_backtest_points(db, user_id, since_month=earliest)
+
 
 def add_expense(db: Session, user_id: int, expense_data: dict):
     if not expense_data.get("category"):
-        expense_data["category"] = MerchantCategorizer.categorize(expense_data.get("title", ""))
-    return create_expense(db, user_id, expense_data)
+        expense_data["category"] = categorize_titles([expense_data.get("title", "")])[0]
+    if not expense_data.get("created_at"):
+        expense_data["created_at"] = datetime.now(timezone.utc)
+    expense = create_expense(db, user_id, expense_data, commit=False)
+    increment_monthly_totals(db, user_id, [expense_data])
+    _invalidate_past_backtests(db, user_id, [expense_data])
+    anomaly = _score_and_update_baselines(db, user_id, [expense_data])[0]
+    db.commit()
+    CacheManager.bump_data_version(user_id)
+    db.refresh(expense)
+    if anomaly:
+        anomaly["expense_id"] = expense.id
+    expense.anomaly = anomaly
+    return expense
+
+
+def add_expenses_bulk(db: Session, user_id: int, records: List[Tuple[int, Union[Dict, str]]]) -> List[Dict]:
+    """Validate, categorize and insert one chunk of imported rows.
+
+    `records` are `(row_number, record)` pairs where a string record is a parse
+    error from the reader. Returns one result per row, in row order. Does not
+    commit: the caller commits once so a whole import is a single transaction.
+    """
+    results = []
+    valid = []
+    for row_number, record in records:
+        if isinstance(record, str):
+            results.append({"row": row_number, "status": "error", "detail": record})
+            continue
+        try:
+            row = ExpenseImportRow.model_validate(record).model_dump()
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            results.append({"row": row_number, "status": "error", "detail": detail})
+            continue
+        results.append({"row": row_number, "status": "created"})
+        valid.append((results[-1], row))
+
+    if not valid:
+        return results
+
+    rows = [row for _, row in valid]
+    missing = [row for row in rows if not row["category"]]
+    for row, label in zip(missing, categorize_titles([row["title"] for row in missing])):
+        row["category"] = label
+    now = datetime.now(timezone.utc)
+    for row in rows:
+        if row["created_at"] is None:
+            row["created_at"] = now
+
+    ids = insert_expenses(db, user_id, rows)
+    increment_monthly_totals(db, user_id, rows)
+    _invalidate_past_backtests(db, user_id, rows)
+    anomalies = _score_and_update_baselines(db, user_id, rows)
+    for (result, row), expense_id, anomaly in zip(valid, ids, anomalies):
+        result["id"] = expense_id
+        result["category"] = row["category"]
+        if anomaly:
+            anomaly["expense_id"] = expense_id
+            result["anomaly"] = anomaly
+    return results
+
+
+def list_expenses(db: Session, user_id: int, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None, category: Optional[str] = None):
+    return get_expenses_by_user(db, user_id, since=since, until=until, category=category)
+
+
+def encode_cursor(created_at: datetime, expense_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{expense_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, expense_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(expense_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def list_expenses_page(db: Session, user_id: int, limit: int, cursor: Optional[str] = None,
+                       since: Optional[datetime] = None, until: Optional[datetime] = None,
+                       category: Optional[str] = None):
+    """Return `(expenses, next_cursor)` for one newest-first page."""
+    after = decode_cursor(cursor) if cursor else None
+    expenses, last_key = get_expenses_page(
+        db, user_id, limit, after=after, since=since, until=until, category=category
+    )
+    return expenses, encode_cursor(*last_key) if last_key else None
+
+
+async def list_expenses_async(db: AsyncSession, user_id: int, since: Optional[datetime] = None,
+                              until: Optional[datetime] = None, category: Optional[str] = None):
+    return await get_expenses_by_user_async(db, user_id, since=since, until=until, category=category)
 
 
-def list_expenses(db: Session, user_id: int):
-    return get_expenses_by_user(db, user_id)
+async def list_expenses_page_async(db: AsyncSession, user_id: int, limit: int, cursor: Optional[str] = None,
+                                   since: Optional[datetime] = None, until: Optional[datetime] = None,
+                                   category: Optional[str] = None):
+    after = decode_cursor(cursor) if cursor else None
+    expenses, last_key = await get_expenses_page_async(
+        db, user_id, limit, after=after, since=since, until=until, category=category
+    )
+    return expenses, encode_cursor(*last_key) if last_key else None
@@ -1,3 +1,4 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.repository import goal_repository
 from app.schemas.goal import GoalCreate, GoalUpdate
@@ -19,3 +20,19 @@ class GoalService:
     @staticmethod
     def delete_goal(db: Session, goal_id: int):
         return goal_repository.delete_goal(db, goal_id)
+
+    @staticmethod
+    async def get_goals_async(db: AsyncSession, user_id: int):
+        return await goal_repository.get_goals_by_user_async(db, user_id)
+
+    @staticmethod
+    async def create_goal_async(db: AsyncSession, user_id: int, goal: GoalCreate):
+        return await goal_repository.create_goal_async(db, goal, user_id)
+
+    @staticmethod
+    async def update_goal_async(db: AsyncSession, goal_id: int, goal_update: GoalUpdate):
+        return await goal_repository.update_goal_async(db, goal_id, goal_update)
+
+    @staticmethod
+    async def delete_goal_async(db: AsyncSession, goal_id: int):
+        return await goal_repository.delete_goal_async(db, goal_id)
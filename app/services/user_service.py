@@ -0,0 +1,10 @@
+from sqlalchemy.orm import Session
+from app.core.cache_manager import CacheManager
+from app.repository.user_repository import update_user_profile
+
+
+def update_profile(db: Session, user_id: int, income: float, savings: float, risk: str):
+    user = update_user_profile(db, user_id, income, savings, risk)
+    if user:
+        CacheManager.bump_data_version(user_id)
+    return user
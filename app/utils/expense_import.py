@@ -0,0 +1,75 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, Tuple, Union
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+_CONTENT_TYPES = {
+    "text/csv": CSV,
+    "application/csv": CSV,
+    "application/x-ndjson": NDJSON,
+    "application/ndjson": NDJSON,
+    "application/jsonl": NDJSON,
+    "application/x-jsonlines": NDJSON,
+}
+
+
+def import_format(content_type: str) -> str:
+    """Map a request Content-Type to a supported import format."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in _CONTENT_TYPES:
+        raise ValueError(f"Unsupported import content type '{media_type}'. Use text/csv or application/x-ndjson.")
+    return _CONTENT_TYPES[media_type]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into text lines without buffering the whole body."""
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            text = line.decode("utf-8").rstrip("\r")
+            if first:
+                text, first = text.lstrip("\ufeff"), False
+            yield text
+    if buffer:
+        text = buffer.decode("utf-8").rstrip("\r")
+        yield text.lstrip("\ufeff") if first else text
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Union[Dict, str]]]:
+    """Yield `(row_number, record)` for each non-blank row of a CSV or NDJSON body.
+
+    Rows that cannot be parsed are yielded as `(row_number, error_message)` so
+    the caller can report them per row instead of failing the whole import.
+    CSV bodies need a header line; records must not contain embedded newlines.
+    """
+    header = None
+    row = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        if fmt == CSV and header is None:
+            header = [h.strip().lower() for h in next(csv.reader([line]))]
+            continue
+
+        row += 1
+        if fmt == CSV:
+            values = next(csv.reader([line]))
+            if len(values) != len(header):
+                yield row, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield row, {k: (v.strip() or None) for k, v in zip(header, values)}
+        else:
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row, "Each NDJSON line must be a JSON object"
+                continue
+            yield row, record
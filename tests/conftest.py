@@ -0,0 +1,13 @@
+import os
+import shutil
+import tempfile
+
+# Point the database and log file at a throwaway directory before any app
+# module reads its settings, so test runs leave nothing behind in the tree.
+_TMP = tempfile.mkdtemp(prefix="expense-oracle-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TMP, 'test.db')}")
+os.environ.setdefault("LOG_FILE", os.path.join(_TMP, "expense_oracle.log"))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TMP, ignore_errors=True)
@@ -0,0 +1,57 @@
+import asyncio
+import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base, async_database_url
+from app.main import app
+from app.models.user import User
+from app.models.expense import Expense
+from app.models.budget import Budget
+from app.models.goal import Goal
+from app.services.expense_service import list_expenses_page_async
+
+
+def test_async_url_uses_async_drivers():
+    assert async_database_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_database_url("sqlite:///./t.db") == "sqlite+aiosqlite:///./t.db"
+
+
+def test_async_keyset_pagination_walks_every_row_once():
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+            db.add(User(id=1, email="a@example.com", hashed_password="x"))
+            base = datetime.datetime(2025, 1, 1)
+            for i in range(11):
+                db.add(Expense(user_id=1, title=f"Shop {i}", amount=float(i),
+                               created_at=base + datetime.timedelta(days=i // 2)))
+            await db.commit()
+
+            seen, cursor = [], None
+            while True:
+                page, cursor = await list_expenses_page_async(db, 1, limit=3, cursor=cursor)
+                seen.extend(page)
+                if not cursor:
+                    break
+        await engine.dispose()
+        return seen
+
+    seen = asyncio.run(run())
+    assert len({e.id for e in seen}) == 11
+    keys = [(e.created_at, e.id) for e in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_async_budget_and_goal_routes():
+    with TestClient(app) as client:
+        created = client.post("/goals/?user_id=1", json={"name": "Trip", "target_amount": 500})
+        assert created.status_code == 200
+        goal_id = created.json()["id"]
+        assert any(g["id"] == goal_id for g in client.get("/goals/?user_id=1").json())
+        assert client.delete(f"/goals/{goal_id}").status_code == 200
+        assert client.delete(f"/goals/{goal_id}").status_code == 404
+        assert client.get("/budgets/?user_id=1").status_code == 200
+
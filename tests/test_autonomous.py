@@ -26,3 +26,86 @@ def test_autonomous_controller_runs():
     profile = {"monthly_budget": 1000, "income": 4000}
     res = ctrl.run_autonomy(expenses, profile)
     assert "decisions" in res and "actions" in res
+
+
+def test_decision_engine_marks_slow_engine_degraded_without_waiting_for_it():
+    import datetime
+    import threading
+    import time
+
+    release = threading.Event()
+
+    class SlowAnomalies:
+        @staticmethod
+        def detect_anomalies(expenses):
+            release.wait(5)
+            return [{"id": 1}]
+
+    expenses = [{"title": "Cafe", "amount": 5.0 + i, "created_at": datetime.datetime(2025, 1 + i % 3, 1)}
+                for i in range(9)]
+    profile = {"monthly_budget": 400, "income": 3000}
+    sequential = DecisionEngine(concurrent=False).evaluate(expenses, profile)
+
+    de = DecisionEngine(concurrent=True, timeouts={"anomalies": 0.05})
+    de._anomaly = SlowAnomalies
+    started = time.perf_counter()
+    out = de.evaluate(expenses, profile)
+    release.set()
+
+    assert time.perf_counter() - started < 1
+    assert out["context"]["degraded"] == ["anomalies"]
+    assert out["anomalies"] == []
+    assert out["forecast"] == sequential["forecast"]
+    engines = out["context"]["engines"]
+    assert engines["forecast"]["status"] == "ok"
+    assert engines["anomalies"]["latency_ms"] >= 50
+    assert sequential["context"]["mode"] == "sequential" and not sequential["context"]["degraded"]
+
+
+def test_decision_engine_cancels_queued_engines_and_reports_their_own_timeouts_as_errors(monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    release = threading.Event()
+    optimized = []
+
+    class SlowAnomalies:
+        @staticmethod
+        def detect_anomalies(expenses):
+            release.wait(5)
+            return []
+
+    class CountingInvestment:
+        @staticmethod
+        def optimize(profile):
+            optimized.append(1)
+            return {"allocation": {}}
+
+    class RedisTimeoutHealth:
+        @staticmethod
+        def calculate_financial_health(expenses, profile):
+            raise TimeoutError("redis read timed out")
+
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(DecisionEngine, "_pool", pool)
+    expenses = [{"amount": 100}, {"amount": 200}]
+    profile = {"monthly_budget": 400, "income": 3000}
+    timeouts = dict.fromkeys(DecisionEngine.ENGINES, 0.2)
+
+    # the single worker is stuck on anomalies, so investment and health never start
+    stuck = DecisionEngine(concurrent=True, timeouts=timeouts)
+    stuck._anomaly, stuck._invest, stuck._health = SlowAnomalies, CountingInvestment, RedisTimeoutHealth
+    out = stuck.evaluate(expenses, profile)
+    release.set()
+    assert out["context"]["degraded"] == ["anomalies", "investment", "health_score"]
+    engines = out["context"]["engines"]
+    assert engines["anomalies"]["latency_ms"] >= 150  # its own run time, measured from start
+    assert engines["investment"]["latency_ms"] == 0.0 and engines["investment"]["queue_ms"] >= 200
+
+    de = DecisionEngine(concurrent=True, timeouts=timeouts)
+    de._invest, de._health = CountingInvestment, RedisTimeoutHealth
+    out = de.evaluate(expenses, profile)
+    pool.shutdown(wait=True)
+    assert optimized == [1]  # the cancelled task from the first call never ran
+    assert out["context"]["degraded"] == []
+    assert out["context"]["engines"]["health_score"]["status"] == "error"
@@ -0,0 +1,199 @@
+import threading
+import time
+import json
+import pytest
+import redis
+from app.core.cache_codec import CacheCodec, CodecError
+from app.core.cache_manager import CacheManager, CircuitBreaker, LocalCache
+from app.ml.analytics import AnalyticsEngine
+from app.ml.investment_optimizer import InvestmentOptimizer
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DownRedis:
+    """Redis client whose every call fails, counting the attempts."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _fail(self, *args, **kwargs):
+        self.calls += 1
+        raise redis.ConnectionError("down")
+
+    get = setex = delete = incr = _fail
+
+    def pipeline(self, transaction=False):
+        return DownPipeline(self)
+
+
+class DownPipeline:
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        pass
+
+    def pttl(self, key):
+        pass
+
+    def execute(self):
+        self.client._fail()
+
+
+def test_local_cache_ttl_lru_and_byte_cap():
+    clock = Clock()
+    cache = LocalCache(max_entries=2, max_bytes=10, clock=clock)
+    cache.set("a", "1111", ttl=5)
+    cache.set("b", "2222", ttl=5)
+    assert cache.get("a") == "1111"  # "a" is now most recently used
+    cache.set("c", "3333", ttl=5)
+    assert cache.get("b") is None
+    assert cache.get("a") == "1111"
+
+    cache.set("d", "4444", ttl=5)  # 12 bytes > cap, evicts LRU "c"
+    assert cache.get("c") is None
+    assert cache.stats()["bytes"] <= 10
+
+    clock.now = 6
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_circuit_breaker_opens_and_probes_after_cooldown():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=2, cooldown=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow()
+
+
+def test_cache_manager_serves_l1_and_skips_down_redis(monkeypatch):
+    down = DownRedis()
+    monkeypatch.setattr(CacheManager, "_redis", down)
+    monkeypatch.setattr(CacheManager, "_local", LocalCache(16, 1 << 20))
+    monkeypatch.setattr(CacheManager, "_breaker", CircuitBreaker(threshold=2, cooldown=60))
+
+    CacheManager.set("forecast:1", {"prediction": 42.0}, expire=3600)
+    value = CacheManager.get("forecast:1")
+    assert value == {"prediction": 42.0}
+    value["prediction"] = 0  # callers get their own copy
+    assert CacheManager.get("forecast:1") == {"prediction": 42.0}
+
+    for _ in range(5):
+        assert CacheManager.get("health_score:1") is None
+    assert down.calls == 2  # set + first miss opened the breaker; later misses skip Redis
+    assert CacheManager.stats()["redis_circuit_open"]
+
+
+def test_data_version_bump_makes_old_entries_unreachable(monkeypatch):
+    monkeypatch.setattr(CacheManager, "_redis", DownRedis())
+    monkeypatch.setattr(CacheManager, "_local", LocalCache(16, 1 << 20))
+    monkeypatch.setattr(CacheManager, "_breaker", CircuitBreaker(threshold=1, cooldown=60))
+    monkeypatch.setattr(CacheManager, "_fallback_versions", {})
+    monkeypatch.setattr(CacheManager, "_pending_bumps", set())
+
+    key = CacheManager.user_key("forecast", 7)
+    CacheManager.set(key, {"prediction": 1.0}, expire=86400)
+    assert CacheManager.get(CacheManager.user_key("forecast", 7)) == {"prediction": 1.0}
+
+    CacheManager.bump_data_version(7)
+    fresh_key = CacheManager.user_key("forecast", 7)
+    assert fresh_key != key
+    assert CacheManager.get(fresh_key) is None
+    assert CacheManager.user_key("forecast", 8) == "forecast:8:v0"
+    assert 7 in CacheManager._pending_bumps  # replayed as INCR once Redis is reachable
+
+
+def _isolated_cache(monkeypatch):
+    monkeypatch.setattr(CacheManager, "_redis", DownRedis())
+    monkeypatch.setattr(CacheManager, "_local", LocalCache(16, 1 << 20))
+    monkeypatch.setattr(CacheManager, "_breaker", CircuitBreaker(threshold=1, cooldown=60))
+    monkeypatch.setattr(CacheManager, "_inflight", {})
+
+
+def test_get_or_compute_single_flight(monkeypatch):
+    _isolated_cache(monkeypatch)
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"score": 80}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(
+        CacheManager.get_or_compute("health_score:1:v0", compute, ttl=600))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"score": 80}] * 8
+
+
+def test_get_or_compute_serves_stale_and_refreshes_once(monkeypatch):
+    _isolated_cache(monkeypatch)
+    CacheManager.set("forecast:1:v0", {"value": {"f": 1}, "fresh_until": 0}, expire=600)
+    gate = threading.Event()
+    calls = []
+
+    def refresh():
+        calls.append(1)
+        gate.wait(5)
+        return {"f": 2}
+
+    def compute():
+        raise AssertionError("the request path must not recompute a stale entry")
+
+    for _ in range(3):
+        assert CacheManager.get_or_compute("forecast:1:v0", compute, ttl=600, soft_ttl=60, refresh=refresh) == {"f": 1}
+    gate.set()
+    for _ in range(100):
+        if not CacheManager._inflight:
+            break
+        time.sleep(0.01)
+    assert CacheManager.get_or_compute("forecast:1:v0", compute, ttl=600, soft_ttl=60) == {"f": 2}
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("serializer", ["json", "orjson", "msgpack"])
+@pytest.mark.parametrize("compression", ["none", "zlib", "zstd"])
+def test_codec_round_trips_and_compresses_large_payloads(serializer, compression):
+    pytest.importorskip({"orjson": "orjson", "msgpack": "msgpack"}.get(serializer, "json"))
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    codec = CacheCodec(serializer, compression, compress_min_bytes=1024)
+    payload = {"series": AnalyticsEngine.get_monte_carlo_distribution(InvestmentOptimizer.simulate(years=1)),
+               "user_id": 3}
+
+    encoded = codec.encode(payload)
+    assert CacheCodec.decode(encoded) == payload
+    assert encoded[:1] == b"\x00"
+    if compression != "none":
+        assert len(encoded) < len(json.dumps(payload)) / 2
+    assert CacheCodec.decode(codec.encode({"small": 1}))["small"] == 1
+
+
+def test_codec_reads_legacy_json_and_rejects_unknown_tags():
+    assert CacheCodec.decode(json.dumps({"prediction": 1.5}).encode()) == {"prediction": 1.5}
+    assert CacheCodec.decode(CacheCodec("legacy").encode({"a": 1})) == {"a": 1}
+    assert not CacheCodec("legacy").encode({"a": 1}).startswith(b"\x00")
+    with pytest.raises(CodecError):
+        CacheCodec.decode(b"\x00?n{}")
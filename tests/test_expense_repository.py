@@ -0,0 +1,129 @@
+import asyncio
+import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.models.user import User
+from app.models.expense import Expense
+from app.models.budget import Budget
+from app.models.goal import Goal
+from app.repository.expense_repository import get_expense_columns, get_expenses_by_user
+from app.repository.snapshot_repository import DEFAULT_INCOME, load_budget_and_income, load_user_snapshot
+from app.ml.anomaly_detector import AnomalyDetector
+from app.ml.expense_columns import ExpenseColumns
+from app.ml.health_score import FinancialHealthScore
+from app.services.expense_service import add_expenses_bulk, list_expenses_page
+from app.utils.expense_import import CSV, iter_records
+
+
+def _session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _seed(db, n=25):
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    base = datetime.datetime(2025, 1, 1)
+    for i in range(n):
+        # two rows per timestamp so the `id` tie-breaker is exercised
+        db.add(Expense(user_id=1, title=f"Shop {i}", amount=float(i),
+                       category="coffee" if i % 2 else "groceries",
+                       created_at=base + datetime.timedelta(days=i // 2)))
+    db.commit()
+
+
+def test_keyset_pagination_walks_every_row_once():
+    db = _session()
+    _seed(db)
+    seen, cursor = [], None
+    while True:
+        page, cursor = list_expenses_page(db, 1, limit=4, cursor=cursor)
+        seen.extend(page)
+        if not cursor:
+            break
+    assert len(seen) == 25
+    assert len({e.id for e in seen}) == 25
+    keys = [(e.created_at, e.id) for e in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_filters_are_pushed_into_sql():
+    db = _session()
+    _seed(db)
+    since = datetime.datetime(2025, 1, 5)
+    until = datetime.datetime(2025, 1, 8)
+    rows = get_expenses_by_user(db, 1, since=since, until=until, category="coffee")
+    assert rows
+    assert all(since <= e.created_at < until and e.category == "coffee" for e in rows)
+
+
+def test_bulk_import_reports_per_row_results():
+    db = _session()
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    db.commit()
+
+    async def body():
+        # chunk boundaries deliberately split lines
+        for part in (b"title,amount,category,created_at\nStarbucks,4.5,,2025-01-03T10:00:00\nbad,", b"oops,,\n", b"Uber,12,transport,\n"):
+            yield part
+
+    async def collect():
+        return [r async for r in iter_records(body(), CSV)]
+
+    records = asyncio.run(collect())
+    results = add_expenses_bulk(db, 1, records)
+    db.commit()
+
+    assert [r["status"] for r in results] == ["created", "error", "created"]
+    assert results[0]["category"] == "coffee"
+    assert results[2]["category"] == "transport"
+    stored = {e.id: e for e in get_expenses_by_user(db, 1)}
+    assert stored[results[0]["id"]].created_at == datetime.datetime(2025, 1, 3, 10, 0)
+    assert len(stored) == 2
+
+
+def test_column_loader_matches_orm_rows_and_engines():
+    db = _session()
+    _seed(db)
+    cols = get_expense_columns(db, 1)
+    orm = sorted(get_expenses_by_user(db, 1), key=lambda e: e.id)
+    assert isinstance(cols, ExpenseColumns)
+    assert cols.ids.tolist() == [e.id for e in orm]
+    assert cols.amounts.tolist() == [e.amount for e in orm]
+    assert list(cols.created_at) == [e.created_at for e in orm]
+
+    dicts = [{"id": e.id, "amount": e.amount, "title": e.title, "created_at": e.created_at,
+              "category": e.category} for e in orm]
+    assert [dict(zip(r.keys(), (r[k] for k in r.keys()))) for r in cols] == dicts
+    assert len(cols[-6:]) == 6 and cols[-1]["id"] == orm[-1].id
+    assert FinancialHealthScore.calculate(cols, 500.0, 5000.0) == FinancialHealthScore.calculate(dicts, 500.0, 5000.0)
+    assert AnomalyDetector.detect_anomalies(cols, 1.0) == AnomalyDetector.detect_anomalies(dicts, 1.0)
+    assert len(get_expense_columns(db, 1, category="coffee")) == 12
+
+
+def test_snapshot_loads_profile_budgets_and_expense_windows():
+    db = _session()
+    _seed(db)
+    user = db.get(User, 1)
+    user.monthly_income = 4200.0
+    db.add_all([Budget(user_id=1, category="coffee", limit_amount=50.0),
+                Budget(user_id=1, category="coffee", limit_amount=25.0),
+                Budget(user_id=1, category="groceries", limit_amount=300.0)])
+    db.commit()
+
+    snapshot = load_user_snapshot(db, 1, recent_since=datetime.datetime(2025, 1, 10))
+    assert snapshot.found and snapshot.income == 4200.0
+    assert snapshot.total_budget == 375.0
+    assert snapshot.category_budgets == {"coffee": 75.0, "groceries": 300.0}
+    assert len(snapshot.expenses) == 25
+    assert len(snapshot.recent_expenses) == 7
+    assert snapshot.profile()["monthly_budget"] == 375.0
+
+    missing = load_user_snapshot(db, 99)
+    assert not missing.found and missing.income == DEFAULT_INCOME
+    assert missing.total_budget == 0.0 and len(missing.expenses) == 0
+
+    assert load_budget_and_income(db, 1) == (snapshot.total_budget, snapshot.income)
+    assert load_budget_and_income(db, 99) == (missing.total_budget, missing.income)
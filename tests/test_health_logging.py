@@ -1,6 +1,9 @@
 import logging
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
 from app.main import app
+from app.core.database import InstrumentedQueuePool, pool_status
 
 
 def test_health_endpoint_returns_ok_or_service_unavailable():
@@ -16,3 +19,25 @@ def test_logging_configured():
     # At least a console handler should be present from our configure_logging
     handlers = getattr(logger, "handlers", [])
     assert len(handlers) >= 1
+
+
+def test_db_pool_endpoint_reports_occupancy():
+    client = TestClient(app)
+    resp = client.get("/health/db-pool")
+    assert resp.status_code == 200
+    assert "pool_class" in resp.json()
+
+
+def test_instrumented_pool_records_waits_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+    held.close()
+
+    status = pool_status(engine)
+    assert status["checkouts"] == 1
+    assert status["checkout_timeouts"] == 1
+    assert status["peak_checked_out"] == 1
+    assert status["checkedout"] == 0
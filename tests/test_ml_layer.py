@@ -1,4 +1,5 @@
 import datetime
+import pytest
 from app.ml.categorizer import MerchantCategorizer
 from app.ml.forecaster import spendingForecaster
 from app.ml.anomaly_detector import AnomalyDetector
@@ -60,3 +61,334 @@ if __name__ == "__main__":
         print(f"\n❌ VERIFICATION FAILED: {str(e)}")
         import traceback
         traceback.print_exc()
+
+
+def test_grouped_anomaly_detection_matches_per_row():
+    import random
+    from app.ml.expense_columns import ExpenseColumns
+
+    rng = random.Random(3)
+    expenses = [{"id": i, "title": rng.choice(["Uber", "uber", "Cafe", "Rent", f"Shop {i % 97}", f"Once {i}"]),
+                 "amount": round(rng.lognormvariate(3, 1), 2), "created_at": None} for i in range(3000)]
+    # zero-spread and all-zero merchants exercise the inf/nan z-score edge cases
+    expenses += [{"id": 10_000 + i, "title": t, "amount": a, "created_at": None}
+                 for i, (t, a) in enumerate([("Flat", 10.0), ("Flat", 10.0), ("Flat", 10.0), ("Flat", 55),
+                                             ("Zero", 0.0), ("Zero", 0.0), ("Zero", 3.0)])]
+    for threshold in (1.0, 2.0, 3.5):
+        reference = AnomalyDetector._detect_per_row(expenses, threshold)
+        assert AnomalyDetector._detect_grouped(expenses, threshold) == reference
+        assert AnomalyDetector._detect_grouped(ExpenseColumns.from_records(expenses), threshold) == reference
+    assert AnomalyDetector.detect_anomalies(expenses[:10]) == AnomalyDetector._detect_per_row(expenses[:10], 2.0)
+
+
+def test_p2_streaming_median_and_mad_track_exact_values():
+    import numpy as np
+    from app.ml.streaming_stats import MerchantStats
+
+    rng = np.random.default_rng(7)
+    amounts = rng.lognormal(3.0, 0.4, 5000)
+    stats = MerchantStats()
+    for x in amounts[:5]:
+        stats.add(float(x))
+    assert stats.median.value() == np.median(amounts[:5])  # exact for small samples
+    for x in amounts[5:]:
+        stats.add(float(x))
+
+    median = np.median(amounts)
+    assert stats.median.value() == pytest.approx(median, rel=0.02)
+    assert stats.mad() == pytest.approx(np.median(np.abs(amounts - median)), rel=0.05)
+    assert stats.running.mean == pytest.approx(amounts.mean())
+    assert stats.running.std == pytest.approx(amounts.std())
+
+
+def test_score_new_expense_matches_batch_detector_on_small_histories():
+    from app.ml.streaming_stats import MerchantStats
+
+    expenses = [{"id": i, "title": t, "amount": a} for i, (t, a) in enumerate(
+        [("Cafe", 4.5), ("Cafe", 5.0), ("Rent", 900.0), ("Cafe", 5.5), ("Cafe", 60.0), ("Jeweller", 2500.0)])]
+    baselines, overall, flagged = {}, MerchantStats(), []
+    for exp in expenses:
+        merchant = baselines.setdefault(exp["title"].lower(), MerchantStats())
+        merchant.add(exp["amount"])
+        overall.add(exp["amount"])
+        report = AnomalyDetector.score_new_expense(exp["title"], exp["amount"], merchant, overall)
+        if report:
+            flagged.append(exp["id"])
+            # the newest expense sees exactly the history the batch detector would use
+            batch = AnomalyDetector.detect_anomalies(expenses[:exp["id"] + 1])
+            assert {**report, "expense_id": exp["id"]} in batch
+    assert flagged == [4, 5]
+    assert AnomalyDetector.score_new_expense("Cafe", 5.0, MerchantStats(), MerchantStats()) is None
+
+
+def test_vectorized_monthly_buckets_match_strftime_loop():
+    import random
+    import numpy as np
+    from app.ml.expense_columns import ExpenseColumns
+    from app.ml.monthly_buckets import monthly_totals
+
+    rng = random.Random(5)
+    plus5 = datetime.timezone(datetime.timedelta(hours=5))
+    expenses = [{"id": i, "title": "x", "category": None, "amount": round(rng.uniform(0.01, 500), 2),
+                 "created_at": datetime.datetime(2023, 1, 1, tzinfo=plus5 if i % 3 == 0 else None)
+                 + datetime.timedelta(hours=rng.randrange(0, 24 * 800))} for i in range(5000)]
+    reference = {}
+    for exp in expenses:
+        key = exp['created_at'].strftime("%Y-%m")
+        reference[key] = reference.get(key, 0) + exp['amount']
+
+    assert monthly_totals(expenses) == dict(sorted(reference.items()))  # exact, not approx
+    columns = ExpenseColumns.from_records(expenses)
+    assert monthly_totals(columns) == monthly_totals(expenses)
+    wall_clock = np.array([e['created_at'].replace(tzinfo=None) for e in expenses], dtype="datetime64[us]")
+    columns.created_at = wall_clock  # a datetime64 column is cast directly
+    assert monthly_totals(columns) == monthly_totals(expenses)
+    assert spendingForecaster.predict_next_month(expenses) == spendingForecaster.predict_from_monthly_totals(reference)
+
+
+def test_walk_forward_backtest_matches_refiltering_and_reports_errors():
+    import random
+    rng = random.Random(11)
+    expenses = [{"amount": round(rng.uniform(5, 300), 2),
+                 "created_at": datetime.datetime(2022, 1, 1) + datetime.timedelta(days=rng.randrange(0, 700))}
+                for _ in range(1500)]
+
+    # reference: re-filter the raw expenses before every forecast
+    months = sorted({e['created_at'].strftime("%Y-%m") for e in expenses})
+    points = []
+    for month in months[2:]:
+        history = [e for e in expenses if e['created_at'].strftime("%Y-%m") < month]
+        actual = sum(e['amount'] for e in expenses if e['created_at'].strftime("%Y-%m") == month)
+        points.append((actual, spendingForecaster.predict_next_month(history)['monthly_forecast']))
+    mape = sum(abs(a - p) / a for a, p in points) / len(points) * 100
+
+    report = MetricsManager.calculate_performance(expenses)["forecast_engine"]
+    assert report["value"] == f"{round(mape, 1)}%"
+    assert report["sample_size"] == f"{len(points)} validation points"
+    assert report["mae"] == pytest.approx(sum(abs(p - a) for a, p in points) / len(points), abs=0.01)
+    assert report["bias"] == pytest.approx(sum(p - a for a, p in points) / len(points), abs=0.01)
+    smape = sum(2 * abs(p - a) / (a + p) for a, p in points) / len(points) * 100
+    assert report["smape"] == f"{round(smape, 1)}%"
+
+    amounts = [120.0, 0.0, 80.5, 310.25, 95.0, 0.0, 42.0]  # zero months have no growth rate
+    assert spendingForecaster.walk_forward(amounts) == [
+        spendingForecaster.predict_from_amounts(amounts[:i])["monthly_forecast"] for i in range(len(amounts))]
+
+
+def test_feature_frame_is_shared_and_matches_raw_inputs():
+    import random
+    from app.ml.expense_columns import ExpenseColumns
+    from app.ml.feature_frame import FinancialFeatureFrame
+    from app.ml.smart_suggestions import SmartSuggestions
+
+    rng = random.Random(2)
+    expenses = [{"id": i, "title": rng.choice(["Uber", "UBER", "Starbucks", "Rent", "Shop"]),
+                 "amount": round(rng.lognormvariate(3, 0.8), 2), "category": rng.choice(["transport", None, "food"]),
+                 "created_at": datetime.datetime(2024, 1, 1) + datetime.timedelta(days=rng.randrange(300))}
+                for i in range(400)]
+    frame = FinancialFeatureFrame.of(ExpenseColumns.from_records(expenses))
+    assert FinancialFeatureFrame.of(frame) is frame
+
+    assert FinancialHealthScore.calculate(frame, 5000, 6000) == FinancialHealthScore.calculate(expenses, 5000, 6000)
+    assert spendingForecaster.predict_next_month(frame) == spendingForecaster.predict_next_month(expenses)
+    assert AnomalyDetector.detect_anomalies(frame) == AnomalyDetector._detect_per_row(expenses, 2.0)
+    assert SmartSuggestions.analyze_patterns(frame) == SmartSuggestions.analyze_patterns(expenses)
+    assert sorted(frame.merchant_names) == ["rent", "shop", "starbucks", "uber"]
+    assert AutonomousEngine.generate_actions(frame, 5000, 6000) == AutonomousEngine.generate_actions(expenses, 5000, 6000)
+
+
+def test_chat_intent_automaton_matches_keyword_scans_and_stays_lazy(monkeypatch):
+    from app.ml.advisor_chatbot import INTENTS, FinancialAdvisorChatbot
+
+    def reference(query):
+        q = query.lower()
+        for intent, keywords, _ in INTENTS:
+            if any(w in q for w in keywords):
+                return intent
+        return "GENERAL"
+
+    queries = ["How am I doing?", "Give me a tip to save money", "predict my budget cap", "What did I spend?",
+               "show transactions", "capital gains", "forecasted status", "hello", "HELP ME INVEST", ""]
+    for query in queries:
+        assert FinancialAdvisorChatbot.detect_intent(query) == reference(query)
+
+    scans = []
+    detect = AnomalyDetector.detect_anomalies
+    monkeypatch.setattr(AnomalyDetector, "detect_anomalies", lambda expenses: scans.append(1) or detect(expenses))
+    expenses = [{"title": "Cafe", "amount": 5.0, "category": "food", "created_at": datetime.datetime(2025, 1, 1)}]
+    reply = FinancialAdvisorChatbot.process_query("any tip?", 1, expenses, 1000, 3000)
+    assert reply["intent"] == "ADVICE"
+    assert reply["context_injected"].startswith("In the last 30 days you spent $5.0.")
+    assert reply["recommendation_engine_output"] == {"health_score": reply["recommendation_engine_output"]["health_score"],
+                                                     "forecast": 5.0, "anomalies_detected": 0}
+    assert scans == [1]  # without a cheaper source the count falls back to a scan
+
+    loaded = []
+
+    def source(name, value):
+        return lambda: loaded.append(name) or value
+
+    cached_health = {"score": 72, "status": "Good", "recommendations": []}
+    cached_forecast = {"monthly_forecast": 900.0, "trend": "stable", "confidence_level": 0.5}
+    sources = {
+        "expenses": source("expenses", expenses),
+        "profile": source("profile", (1000.0, 3000.0)),
+        "recent_expenses": source("recent_expenses", expenses),
+        "health": source("health", cached_health),
+        "forecast": source("forecast", cached_forecast),
+        "anomaly_count": source("anomaly_count", 3),
+    }
+    reply = FinancialAdvisorChatbot.process_query("how am i doing?", 1, sources=sources)
+    assert reply["response"].startswith("Your Financial Health Score is 72 (Good).")
+    assert reply["recommendation_engine_output"] == {"health_score": 72, "forecast": 900.0, "anomalies_detected": 3}
+    assert "expenses" not in loaded and "profile" not in loaded and scans == [1]
+    assert sorted(loaded) == ["anomaly_count", "forecast", "health", "recent_expenses"]
+
+
+def test_chunked_monte_carlo_compounds_yearly_returns_and_estimates_percentiles():
+    import numpy as np
+    from app.ml.monte_carlo import simulate_paths
+
+    mu, sigma = np.array([0.08, 0.12]), np.array([0.12, 0.20])
+    single = simulate_paths(["a", "b"], mu, sigma, years=5, iterations=40_000, seed=9)
+    # same draws, compounded exactly
+    returns = np.random.default_rng(9).normal(mu[:, None, None], sigma[:, None, None], size=(2, 40_000, 5))
+    wealth = np.cumprod(np.maximum(1 + returns, 0), axis=2)
+    exact = np.moveaxis(np.percentile(wealth, [10, 50, 90], axis=1), 0, -1)
+    assert np.allclose(single.percentiles(), exact, rtol=0.005)
+    assert np.allclose(single.mean, wealth.mean(axis=1))
+
+    chunked = simulate_paths(["a", "b"], mu, sigma, years=5, iterations=40_000, seed=9, chunk_bytes=64 * 1024)
+    assert np.allclose(chunked.percentiles(), exact, rtol=0.03)
+    again = simulate_paths(["a", "b"], mu, sigma, years=5, iterations=40_000, seed=9, chunk_bytes=64 * 1024)
+    assert np.array_equal(chunked.histograms, again.histograms)
+
+    result = InvestmentOptimizer.simulate_monte_carlo(10_000, years=3, iterations=2_000, seed=1)
+    bands = result["Moderate"]["yearly_bands"]
+    assert [b["year"] for b in bands] == [1, 2, 3]
+    assert bands[-1]["p90"] == result["Moderate"]["projection"]["p90_best_case"]
+    assert all(b["p10"] < b["p50"] < b["p90"] for b in bands)
+
+
+def test_seeded_simulations_are_memoized_and_scaled_by_principal():
+    from app.ml import investment_optimizer
+
+    investment_optimizer._simulate_cached.cache_clear()
+    small = InvestmentOptimizer.simulate_monte_carlo(1_000, years=4, iterations=5_000, seed=5)
+    large = InvestmentOptimizer.simulate_monte_carlo(250_000, years=4, iterations=5_000, seed=5)
+    info = investment_optimizer._simulate_cached.cache_info()
+    assert (info.misses, info.hits) == (1, 1)
+    for name in InvestmentOptimizer.PORTFOLIOS:
+        assert large[name]["projection"]["mean"] == pytest.approx(small[name]["projection"]["mean"] * 250, rel=1e-4)
+
+    assert InvestmentOptimizer.simulate(4, 5_000, seed=5) is InvestmentOptimizer.simulate(4, 5_000, seed=5)
+    assert InvestmentOptimizer.simulate(4, 5_000, seed=None) is not InvestmentOptimizer.simulate(4, 5_000, seed=None)
+    with pytest.raises(ValueError):
+        InvestmentOptimizer.simulate(4, 5_000, seed=5).histograms[0, 0, 0] = 1
+
+
+def test_wealth_histogram_comes_from_the_simulated_outcomes():
+    import numpy as np
+    from app.ml.analytics import AnalyticsEngine
+    from app.ml.monte_carlo import simulate_paths
+
+    mu, sigma = np.array([0.05, 0.12]), np.array([0.10, 0.25])
+    result = simulate_paths(["a", "b"], mu, sigma, years=1, iterations=50_000, seed=3)
+    centers, density = result.distribution(bins=40)
+    assert result.distribution(bins=40)[0] is centers  # memoized on the result
+
+    outcomes = np.random.default_rng(3).normal(mu[:, None], sigma[:, None], size=(2, 50_000))
+    for p in range(2):
+        width = centers[p, 1] - centers[p, 0]
+        edges = np.append(centers[p] - width / 2, centers[p, -1] + width / 2)
+        exact, _ = np.histogram(outcomes[p], bins=edges)
+        assert np.abs(density[p] * width * 50_000 - exact).max() <= 0.02 * exact.max()
+        assert 0.97 < (density[p] * width).sum() <= 1
+    assert centers[1, -1] - centers[1, 0] > 2 * (centers[0, -1] - centers[0, 0])  # wider for the riskier mix
+
+    chart = AnalyticsEngine.get_monte_carlo_distribution(result, bins=40)
+    assert list(chart) == ["a", "b"]
+    assert len(chart["b"]) == 40 and set(chart["b"][0]) == {"x", "y"}
+
+
+def test_categorizer_batches_and_memoizes_normalized_titles(monkeypatch):
+    MerchantCategorizer.clear_cache()
+    batches = []
+    predict = MerchantCategorizer._predict.__func__
+
+    def counting_predict(cls, texts):
+        batches.append(list(texts))
+        return predict(cls, texts)
+
+    monkeypatch.setattr(MerchantCategorizer, "_predict", classmethod(counting_predict))
+    monkeypatch.setattr(MerchantCategorizer, "CACHE_SIZE", 3)
+
+    titles = ["STARBUCKS  Latte", "starbucks latte", "Uber ride", "Walmart", "uber RIDE"]
+    results = MerchantCategorizer.categorize_many(titles)
+    assert batches == [["starbucks latte", "uber ride", "walmart"]]
+    assert results[0] == results[1] and results[2] == results[4]
+    assert [r["category"] for r in results] == [r["category"] for r in predict(MerchantCategorizer, titles)]
+
+    results[0]["category"] = "changed"  # callers get copies
+    assert MerchantCategorizer.categorize("Starbucks latte")["category"] != "changed"
+    MerchantCategorizer.categorize("Target")  # evicts the least recently used title, "uber ride"
+    MerchantCategorizer.categorize_many(["Walmart", "Uber Ride"])
+    assert batches[1:] == [["target"], ["uber ride"]]
+    MerchantCategorizer.clear_cache()
+
+
+def _sse_events(text):
+    import json
+
+    events = []
+    for block in text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_chat_stream_sends_intent_first_and_ends_with_full_reply():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        response = client.post("/ml/chat/stream?user_id=1", json={"query": "what will I spend next month?"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(response.text)
+        names = [name for name, _ in events]
+        assert names[0] == "intent" and names[1] == "fact" and names[-1] == "done"
+        assert "answer" in names
+        done = events[-1][1]
+        assert done["intent"] == "FORECAST"
+        assert set(done["recommendation_engine_output"]) == {"health_score", "forecast", "anomalies_detected"}
+
+
+def test_chat_stream_sends_the_30_day_fact_before_loading_history_and_reports_failures(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.api.v1 import ml
+    from app.main import app
+    from app.ml.advisor_chatbot import FinancialAdvisorChatbot
+
+    loaded = []
+    recent = [{"title": "Cafe", "amount": 4.5, "category": "food", "created_at": datetime.datetime(2025, 1, 1)}]
+
+    def load_context():
+        loaded.append("history")
+        return recent, 1000, 3000
+
+    stream = FinancialAdvisorChatbot.stream_query("any tip?", 1, lambda: recent, load_context)
+    assert [next(stream)[0], next(stream)] == ["intent", ("fact", {"signal": "spent_30d", "value": 4.5,
+                                                                     "text": "In the last 30 days you spent $4.5."})]
+    assert loaded == []
+    assert [name for name, _ in stream][-1] == "done" and loaded == ["history"]
+
+    def broken_snapshot(db, user_id, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(ml, "load_user_snapshot", broken_snapshot)
+    with TestClient(app) as client:
+        response = client.post("/ml/chat/stream?user_id=1", json={"query": "how am I doing?"})
+    events = _sse_events(response.text)
+    assert [name for name, _ in events][0] == "intent"
+    assert events[-1][0] == "error" and "detail" in events[-1][1]
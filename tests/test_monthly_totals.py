@@ -0,0 +1,175 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.models.user import User
+from app.models.expense import Expense
+from app.models.budget import Budget
+from app.models.goal import Goal
+from app.models.monthly_total import UserMonthlyTotal
+from app.models.merchant_baseline import MerchantBaseline
+from app.models.backtest_point import ForecastBacktestPoint
+from app.repository.expense_repository import get_expenses_by_user
+from app.repository.merchant_baseline_repository import anomaly_count, rebuild_merchant_baselines
+from app.repository.monthly_total_repository import (
+    get_monthly_category_totals,
+    get_monthly_totals,
+    rebuild_monthly_totals,
+)
+from app.services.expense_service import add_expense, add_expenses_bulk
+from app.services.analytics_service import forecast_vs_actual
+from app.repository.backtest_repository import get_backtest_points, save_backtest_points
+from app.ml.forecaster import spendingForecaster
+from app.ml.metrics_manager import MetricsManager
+
+
+def _session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    db.commit()
+    return db
+
+
+def test_writes_maintain_rollup_and_backfill_matches():
+    db = _session()
+    add_expense(db, 1, {"title": "Starbucks", "amount": 5.0})
+    add_expense(db, 1, {"title": "Starbucks", "amount": 7.0})
+    records = [
+        (i + 1, {"title": "Uber", "amount": 10.0 + i, "category": "transport",
+                 "created_at": datetime.datetime(2025, 1 + i % 4, 15)})
+        for i in range(12)
+    ]
+    add_expenses_bulk(db, 1, records)
+    db.commit()
+
+    incremental = get_monthly_category_totals(db, 1)
+    assert sum(r["count"] for r in incremental) == 14
+
+    rebuild_monthly_totals(db, 1)
+    db.commit()
+    rebuilt = get_monthly_category_totals(db, 1)
+    assert [(r["month"], r["category"], r["count"]) for r in rebuilt] == \
+        [(r["month"], r["category"], r["count"]) for r in incremental]
+    assert [r["total"] for r in rebuilt] == pytest.approx([r["total"] for r in incremental])
+
+
+
+def test_backfill_buckets_in_utc_and_has_a_portable_fallback(monkeypatch):
+    from app.repository import monthly_total_repository
+
+    db = _session()
+    eastern = datetime.timezone(datetime.timedelta(hours=-5))
+    add_expense(db, 1, {"title": "Late dinner", "amount": 40.0, "category": "food",
+                        "created_at": datetime.datetime(2025, 1, 31, 21, 30, tzinfo=eastern)})
+    add_expense(db, 1, {"title": "Lunch", "amount": 12.0, "category": "food",
+                        "created_at": datetime.datetime(2025, 1, 15, 12, 0)})
+    incremental = get_monthly_category_totals(db, 1)
+    assert [r["month"] for r in incremental] == ["2025-01", "2025-02"]  # 21:30 EST is Feb 1 in UTC
+
+    rebuild_monthly_totals(db, 1)
+    db.commit()
+    assert get_monthly_category_totals(db, 1) == incremental
+
+    monkeypatch.setattr(monthly_total_repository, "_month_expr", lambda dialect: None)
+    assert rebuild_monthly_totals(db, 1) == 2
+    db.commit()
+    assert get_monthly_category_totals(db, 1) == incremental
+
+def test_forecast_and_metrics_from_rollup_match_raw_expenses():
+    db = _session()
+    records = [
+        (i + 1, {"title": f"Shop {i % 3}", "amount": 100.0 + 7 * i, "category": "groceries",
+                 "created_at": datetime.datetime(2024, 1 + i % 12, 1 + i % 27)})
+        for i in range(60)
+    ]
+    add_expenses_bulk(db, 1, records)
+    db.commit()
+
+    expenses = [{"amount": e.amount, "created_at": e.created_at} for e in get_expenses_by_user(db, 1)]
+    monthly = get_monthly_totals(db, 1)
+
+    from_raw = spendingForecaster.predict_next_month(expenses)
+    from_rollup = spendingForecaster.predict_from_monthly_totals(monthly)
+    assert from_rollup["monthly_forecast"] == pytest.approx(from_raw["monthly_forecast"])
+    assert from_rollup["trend"] == from_raw["trend"]
+
+    assert MetricsManager.calculate_performance_from_monthly_totals(monthly)["forecast_engine"] == \
+        MetricsManager.calculate_performance(expenses)["forecast_engine"]
+
+
+def test_writes_score_against_merchant_baselines_and_backfill_matches():
+    db = _session()
+    for amount in (4.0, 4.5, 5.0, 4.5):
+        assert add_expense(db, 1, {"title": "Starbucks", "amount": amount}).anomaly is None
+    flagged = add_expense(db, 1, {"title": "STARBUCKS", "amount": 48.0})
+    assert flagged.anomaly["expense_id"] == flagged.id
+    assert flagged.anomaly["z_score"] > 2
+
+    results = add_expenses_bulk(db, 1, [(1, {"title": "Starbucks", "amount": 4.5}),
+                                        (2, {"title": "Starbucks", "amount": 90.0})])
+    db.commit()
+    assert "anomaly" not in results[0]
+    assert results[1]["anomaly"]["expense_id"] == results[1]["id"]
+
+    def snapshot():
+        return sorted((b.merchant, b.count, round(b.mean, 6), round(b.m2, 6), b.sketch, b.anomalies)
+                      for b in db.query(MerchantBaseline).filter_by(user_id=1))
+
+    incremental = snapshot()
+    assert [(m, n) for m, n, *_ in incremental] == [("*", 7), ("starbucks", 7)]
+    assert anomaly_count(db, 1) == 2 and anomaly_count(db, 2) == 0
+    rebuild_merchant_baselines(db, 1)
+    db.commit()
+    assert snapshot() == incremental
+
+
+def test_forecast_vs_actual_persists_backtest_points_and_invalidates_on_backdated_writes(monkeypatch):
+    db = _session()
+    records = [
+        (i + 1, {"title": "Rent", "amount": 1000.0 + 10 * i, "category": "housing",
+                 "created_at": datetime.datetime(2025, 1 + i % 9, 3)})
+        for i in range(27)
+    ]
+    add_expenses_bulk(db, 1, records)
+    db.commit()
+    now = datetime.datetime(2025, 10, 5, tzinfo=datetime.timezone.utc)
+
+    series = forecast_vs_actual(db, 1, now=now)
+    assert [p["period"] for p in series] == ["2025-05", "2025-06", "2025-07", "2025-08", "2025-09", "2025-10"]
+    assert series[-1]["month"] == "Oct (Pred)" and series[-1]["actual"] is None
+    stored = get_backtest_points(db, 1)
+    assert sorted(stored) == [f"2025-0{m}" for m in range(2, 10)]
+    amounts = list(get_monthly_totals(db, 1).values())
+    assert stored["2025-09"] == (amounts[8], spendingForecaster.predict_from_amounts(amounts[:8])["monthly_forecast"])
+
+    calls = []
+    original = spendingForecaster.predict_from_amounts.__func__
+    monkeypatch.setattr(spendingForecaster, "predict_from_amounts",
+                        classmethod(lambda cls, a: calls.append(len(a)) or original(cls, a)))
+    assert forecast_vs_actual(db, 1, now=now) == series
+    assert calls == [9]  # only the current month's forecast; stored points are reused
+
+    add_expense(db, 1, {"title": "Rent", "amount": 500.0, "created_at": datetime.datetime(2025, 7, 9)})
+    assert sorted(get_backtest_points(db, 1)) == ["2025-02", "2025-03", "2025-04", "2025-05", "2025-06"]
+    assert forecast_vs_actual(db, 1, now=now)[2]["actual"] == pytest.approx(series[2]["actual"] + 500)
+
+    # a request that read the rollup before that write stores its stale points
+    # only after the write's invalidation committed
+    save_backtest_points(db, 1, {m: p for m, p in stored.items() if m >= "2025-07"})
+    db.commit()
+    fresh = forecast_vs_actual(db, 1, now=now)
+    assert fresh[2]["actual"] == pytest.approx(series[2]["actual"] + 500)
+    assert get_backtest_points(db, 1)["2025-07"][0] == pytest.approx(stored["2025-07"][0] + 500)
+
+    # a new earliest month shifts every forecast although no stored actual changed
+    add_expense(db, 1, {"title": "Rent", "amount": 900.0, "created_at": datetime.datetime(2024, 12, 9)})
+    save_backtest_points(db, 1, {m: p for m, p in stored.items() if m < "2025-07"})
+    db.commit()
+    forecast_vs_actual(db, 1, now=now)
+    assert sorted(get_backtest_points(db, 1))[0] == "2025-01"
+    totals = list(get_monthly_totals(db, 1).values())
+    assert get_backtest_points(db, 1)["2025-02"][1] == spendingForecaster.predict_from_amounts(totals[:2])["monthly_forecast"]
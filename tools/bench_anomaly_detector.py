@@ -0,0 +1,73 @@
+"""Benchmark AnomalyDetector's per-row and grouped implementations.
+
+Generates a synthetic expense history (100k rows by default over a few
+hundred recurring merchants plus 2% one-off merchants), checks that both
+implementations return identical anomalies and prints the median runtime
+of each:
+
+    python -m tools.bench_anomaly_detector --rows 100000
+"""
+import argparse
+import datetime
+import random
+import statistics
+import time
+
+from app.ml.anomaly_detector import AnomalyDetector
+from app.ml.expense_columns import ExpenseColumns
+
+
+def synthetic_expenses(rows: int, merchants: int, seed: int = 7):
+    rng = random.Random(seed)
+    base = datetime.datetime(2024, 1, 1)
+    typical = [rng.uniform(3, 300) for _ in range(merchants)]
+    expenses = []
+    for i in range(rows):
+        if rng.random() < 0.02:
+            title, amount = f"One-off {i}", rng.uniform(1, 2000)
+        else:
+            m = rng.randrange(merchants)
+            amount = typical[m] * rng.lognormvariate(0, 0.25)
+            if rng.random() < 0.01:
+                amount *= rng.uniform(4, 12)
+            title = f"Merchant {m}" if i % 3 else f"MERCHANT {m}"
+        expenses.append({"id": i + 1, "title": title, "amount": round(amount, 2),
+                         "category": None, "created_at": base + datetime.timedelta(minutes=i)})
+    return expenses
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--merchants", type=int, default=400)
+    parser.add_argument("--threshold", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    expenses = synthetic_expenses(args.rows, args.merchants)
+    columns = ExpenseColumns.from_records(expenses)
+
+    reference = AnomalyDetector._detect_per_row(expenses, args.threshold)
+    assert AnomalyDetector._detect_grouped(expenses, args.threshold) == reference
+    assert AnomalyDetector._detect_grouped(columns, args.threshold) == reference
+    print(f"{args.rows} rows, {len(reference)} anomalies, outputs identical")
+
+    per_row = timed(lambda: AnomalyDetector._detect_per_row(expenses, args.threshold), args.repeat)
+    grouped = timed(lambda: AnomalyDetector._detect_grouped(expenses, args.threshold), args.repeat)
+    grouped_columns = timed(lambda: AnomalyDetector._detect_grouped(columns, args.threshold), args.repeat)
+    print(f"per-row (dicts):     {per_row * 1000:9.1f} ms")
+    print(f"grouped (dicts):     {grouped * 1000:9.1f} ms  ({per_row / grouped:.1f}x)")
+    print(f"grouped (columns):   {grouped_columns * 1000:9.1f} ms  ({per_row / grouped_columns:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()